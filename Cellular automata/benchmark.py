@@ -0,0 +1,125 @@
+import time
+import argparse
+import numpy as np
+from main import ForestFire
+
+# Engine parallel má vlastní měření škálování podle počtu procesů
+SERIAL_ENGINES = [engine for engine in ForestFire.ENGINES if engine != "parallel"]
+
+
+def time_engine(engine, size, steps, use_moore=False, **params):
+    """Vrací průměrný čas jednoho kroku v sekundách"""
+    np.random.seed(0)
+    forest = ForestFire(width=size, height=size, use_moore=use_moore, engine=engine, **params)
+    forest.initialize_forest(add_initial_fires=True)
+    start = time.perf_counter()
+    for _ in range(steps):
+        forest.update()
+    return (time.perf_counter() - start) / steps
+
+
+def time_parallel(size, steps, workers, use_moore=False, **params):
+    """Průměrný čas kroku enginu parallel (bez spuštění procesů) a výsledná mřížka"""
+    np.random.seed(0)
+    forest = ForestFire(width=size, height=size, use_moore=use_moore, engine="parallel", seed=0, workers=workers,
+                        **params)
+    forest.initialize_forest(add_initial_fires=True)
+    try:
+        forest.update()
+        start = time.perf_counter()
+        for _ in range(steps):
+            forest.update()
+        return (time.perf_counter() - start) / steps, forest.grid.copy()
+    finally:
+        forest.close()
+
+
+def scaling(size, steps, workers_list, use_moore=False, **params):
+    """Škálování enginu parallel podle počtu procesů, porovnané s enginem vectorized se stejným seedem"""
+    np.random.seed(0)
+    serial = ForestFire(width=size, height=size, use_moore=use_moore, seed=0, **params)
+    serial.initialize_forest(add_initial_fires=True)
+    start = time.perf_counter()
+    for _ in range(steps + 1):
+        serial.update()
+    baseline = (time.perf_counter() - start) / (steps + 1)
+
+    print(f"\nŠkálování enginu parallel ({size}x{size}, {steps} kroků):")
+    print(f"{'procesy':>10} {'ms/krok':>10} {'zrychlení':>10} {'shoda':>8}")
+    print(f"{'serial':>10} {baseline * 1000:>10.2f} {'1.0x':>10} {'-':>8}")
+    for workers in workers_list:
+        seconds, grid = time_parallel(size, steps, workers, use_moore, **params)
+        same = "ano" if np.array_equal(grid, serial.grid) else "ne"
+        print(f"{workers:>10} {seconds * 1000:>10.2f} {baseline / seconds:>9.1f}x {same:>8}")
+
+
+def mean_stats(engine, size, steps, use_moore=False):
+    """Průměrné zastoupení stavů během simulace - oba enginy mají dávat stejná rozdělení"""
+    np.random.seed(1)
+    forest = ForestFire(width=size, height=size, use_moore=use_moore, engine=engine)
+    forest.initialize_forest(add_initial_fires=True)
+    totals = {"tree": 0.0, "burning": 0.0, "burnt": 0.0}
+    for _ in range(steps):
+        forest.update()
+        for key, value in forest.get_stats().items():
+            totals[key] += value / steps
+    return totals
+
+
+def compare_engines(size, steps, seed=0, use_moore=False, workers=2):
+    """Se seedem mají všechny enginy dávat stejný průběh - vrací enginy, jejichž mřížka se liší od loop"""
+    grids = {}
+    for engine in ForestFire.ENGINES:
+        forest = ForestFire(width=size, height=size, use_moore=use_moore, engine=engine, seed=seed, workers=workers)
+        forest.initialize_forest(add_initial_fires=True)
+        for _ in range(steps):
+            forest.update()
+        grids[engine] = forest.grid.copy()
+        forest.close()
+    return [engine for engine, grid in grids.items() if not np.array_equal(grid, grids["loop"])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Porovnání rychlosti enginů ForestFire")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 200, 500, 1000, 2000])
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--loop-max-size", type=int, default=200,
+                        help="Původní cyklus po buňkách se měří jen do této velikosti")
+    parser.add_argument("--moore", action="store_true", help="Moorovo okolí")
+    parser.add_argument("--p", type=float, default=0.05, help="Pravděpodobnost růstu")
+    parser.add_argument("--f", type=float, default=0.001, help="Pravděpodobnost vznícení")
+    parser.add_argument("--density", type=float, default=0.5, help="Počáteční hustota stromů")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Změří škálování enginu parallel pro zadané počty procesů (např. 1 2 4 8)")
+    parser.add_argument("--scaling-size", type=int, default=4000, help="Velikost mřížky pro měření škálování")
+    args = parser.parse_args()
+    params = {"p": args.p, "f": args.f, "density": args.density}
+
+    print(f"{'velikost':>10} {'engine':>12} {'ms/krok':>10} {'zrychlení':>10}")
+    for size in args.sizes:
+        baseline = None
+        # Původní cyklus jako první, ostatní enginy se k němu porovnávají
+        for engine in ["loop"] + [engine for engine in SERIAL_ENGINES if engine != "loop"]:
+            if engine == "loop" and size > args.loop_max_size:
+                continue
+            steps = max(1, args.steps // 10) if engine == "loop" else args.steps
+            seconds = time_engine(engine, size, steps, args.moore, **params)
+            if engine == "loop":
+                baseline = seconds
+            speedup = f"{baseline / seconds:.1f}x" if baseline else "-"
+            print(f"{size:>10} {engine:>12} {seconds * 1000:>10.2f} {speedup:>10}")
+
+    print("\nPrůměrné zastoupení stavů (100x100, 200 kroků):")
+    for engine in SERIAL_ENGINES:
+        stats = mean_stats(engine, 100, 200, args.moore)
+        print(f"{engine:>12}: " + ", ".join(f"{key} {value:.3f}" for key, value in stats.items()))
+
+    different = compare_engines(60, 50, use_moore=args.moore)
+    print("\nShoda enginů se seedem (60x60, 50 kroků): " + (f"liší se {', '.join(different)}" if different else "ano"))
+
+    if args.workers:
+        scaling(args.scaling_size, args.steps, args.workers, args.moore, **params)
+
+
+if __name__ == "__main__":
+    main()
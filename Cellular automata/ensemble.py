@@ -0,0 +1,87 @@
+import numpy as np
+from kernels import EMPTY, TREE, BURNING, burning_neighbors, apply_transitions
+
+# Velikosti požárů se ukládají do histogramu s binem k pro velikosti 2^k .. 2^(k+1)-1
+FIRE_SIZE_BINS = 32
+
+
+def batch_parameter(value, count):
+    """Parametr pro celou dávku (jedno číslo) nebo pro každý les zvlášť, ve tvaru (count, 1, 1)"""
+    return np.broadcast_to(np.asarray(value, dtype=np.float64), (count,)).reshape(count, 1, 1)
+
+
+class ForestFireEnsemble:
+    """Dávka count nezávislých lesů v jednom poli (count, height, width), krok pro všechny najednou"""
+
+    def __init__(self, count, width=100, height=100, p=0.05, f=0.001, density=0.5, burnout_prob=0.8,
+                 use_moore=False, seed=None):
+        # Parametry p, f, density a burnout_prob mohou být čísla nebo pole délky count (jeden les = jedna sada)
+        self.count = count
+        self.width = width
+        self.height = height
+        self.p = batch_parameter(p, count)
+        self.f = batch_parameter(f, count)
+        self.density = batch_parameter(density, count)
+        self.burnout_prob = batch_parameter(burnout_prob, count)
+        self.use_moore = use_moore
+        self.rng = np.random.default_rng(seed)
+        self.grid = np.zeros((count, height, width), dtype=np.uint8)
+        self.next_grid = np.zeros_like(self.grid)
+        self.initialize_forest()
+
+    def initialize_forest(self, add_initial_fires=True):
+        """Inicializuje všechny lesy s jejich hustotou stromů, volitelně se 3 ohnisky v každém"""
+        random_values = self.rng.random(self.grid.shape)
+        self.grid[:] = np.where(random_values < self.density, TREE, EMPTY)
+        if add_initial_fires:
+            forests = np.repeat(np.arange(self.count), 3)
+            rows = self.rng.integers(0, self.height, forests.size)
+            cols = self.rng.integers(0, self.width, forests.size)
+            trees = self.grid[forests, rows, cols] == TREE
+            self.grid[forests[trees], rows[trees], cols[trees]] = BURNING
+
+    def update(self):
+        """Jeden krok všech lesů, vrací počet nově vznícených stromů v každém lese"""
+        near_fire = burning_neighbors(self.grid == BURNING, self.use_moore)
+        random_values = self.rng.random(self.grid.shape)
+        apply_transitions(self.grid, near_fire, random_values, self.p, self.f, self.burnout_prob, self.next_grid)
+        ignited = np.count_nonzero((self.grid == TREE) & (self.next_grid == BURNING), axis=(1, 2))
+        self.grid, self.next_grid = self.next_grid, self.grid
+        return ignited
+
+    def count_state(self, state):
+        """Počet buněk v daném stavu pro každý les"""
+        return np.count_nonzero(self.grid == state, axis=(1, 2))
+
+    def run(self, steps, burn_in=0):
+        """Simuluje steps kroků a vrací souhrnné statistiky každého lesa"""
+        # - mean_tree_density: průměrný podíl stromů v krocích po prvních burn_in krocích
+        # - fire_sizes: histogram velikostí požárů (FIRE_SIZE_BINS binů po mocninách 2). Požár je souvislé
+        #   období, kdy v lese něco hoří, jeho velikost je počet stromů, které se během něj vznítily.
+        # - extinction_time: první krok, po kterém v lese nic nehoří (-1, pokud oheň nevyhasl)
+        if burn_in >= steps:
+            raise ValueError(f"burn_in ({burn_in}) musí být menší než počet kroků ({steps})")
+        cells = self.width * self.height
+        tree_density = np.zeros(self.count)
+        fire_sizes = np.zeros((self.count, FIRE_SIZE_BINS), dtype=np.int64)
+        extinction_time = np.full(self.count, -1, dtype=np.int64)
+        current_fire = self.count_state(BURNING)
+
+        for step in range(1, steps + 1):
+            ignited = self.update()
+            burning = self.count_state(BURNING)
+            if step > burn_in:
+                tree_density += self.count_state(TREE) / cells
+            current_fire += ignited
+            ended = (burning == 0) & (current_fire > 0)
+            if ended.any():
+                size_bins = np.minimum(np.log2(current_fire[ended]).astype(np.int64), FIRE_SIZE_BINS - 1)
+                np.add.at(fire_sizes, (np.flatnonzero(ended), size_bins), 1)
+                current_fire[ended] = 0
+            extinction_time[(burning == 0) & (extinction_time < 0)] = step
+
+        return {
+            "mean_tree_density": tree_density / (steps - burn_in),
+            "fire_sizes": fire_sizes,
+            "extinction_time": extinction_time,
+        }
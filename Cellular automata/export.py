@@ -0,0 +1,157 @@
+import os
+import queue
+import argparse
+import threading
+import time
+from PIL import Image, GifImagePlugin
+from frames import STATE_COLORS, DOWNSAMPLE_MODES, fit_frame, parse_size
+
+# Paleta obrázků v režimu "P" - index barvy je přímo stav buňky
+PALETTE = STATE_COLORS.reshape(-1).tolist()
+
+
+def palette_image(grid, size=None, mode="burning"):
+    """Obrázek s paletou přímo z mřížky stavů (bez matplotlib), volitelně přizpůsobený velikosti (šířka, výška)"""
+    if size is not None:
+        width, height = size
+        grid = fit_frame(grid, width, height, mode)
+    image = Image.fromarray(grid, mode="P")
+    image.putpalette(PALETTE)
+    if size is not None and image.size != tuple(size):
+        image = image.resize(size, Image.NEAREST)
+    return image
+
+
+# PngWriter a GifWriter jsou převzaté z TEA/batch_render.py (tam zapisují RGB snímky),
+# oprava jedné kopie patří i do druhé
+
+class PngWriter:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, index, image):
+        image.save(os.path.join(self.directory, f"frame_{index:05d}.png"))
+
+    def close(self):
+        pass
+
+
+class GifWriter:
+    # Animovaný GIF zapisovaný průběžně snímek po snímku - v paměti je vždy jen jeden snímek
+    def __init__(self, path, fps):
+        self.file = open(path, "wb")
+        self.duration = round(1000 / fps)
+        self.started = False
+
+    def write(self, index, image):
+        if not self.started:
+            header, _ = GifImagePlugin.getheader(image, info={"loop": 0})
+            self.file.writelines(header)
+            self.started = True
+        self.file.writelines(GifImagePlugin.getdata(image, duration=self.duration, include_color_table=True))
+
+    def close(self):
+        self.file.write(b";")
+        self.file.close()
+
+
+class FrameExporter:
+    """Zápis snímků mřížky do GIF (soubor .gif) nebo řady PNG (adresář) ve vlákně na pozadí"""
+
+    def __init__(self, output, size=None, fps=10, mode="burning", max_queue=16):
+        # Snímky se předávají přes frontu omezené délky - simulace se zastaví, jen když je zápis
+        # pozadu o max_queue snímků, a v paměti nikdy není celá animace
+        self.size = size
+        self.mode = mode
+        self.writer = GifWriter(output, fps) if output.lower().endswith(".gif") else PngWriter(output)
+        self.frames = queue.Queue(maxsize=max_queue)
+        self.error = None
+        self.count = 0
+        self.thread = threading.Thread(target=self._encode, daemon=True)
+        self.thread.start()
+
+    def _encode(self):
+        index = 0
+        while True:
+            grid = self.frames.get()
+            if grid is None:
+                break
+            if self.error is None:
+                try:
+                    self.writer.write(index, palette_image(grid, self.size, self.mode))
+                except Exception as error:
+                    # Chyba se předá volajícímu v add/close, zbylé snímky se jen vyberou z fronty
+                    self.error = error
+            index += 1
+
+    def add(self, grid):
+        """Přidá snímek (mřížku stavů), při plné frontě počká na zápis starších snímků"""
+        if self.error is not None:
+            raise self.error
+        # Přizpůsobení velikosti se provede hned - do fronty jde malá kopie, ne celá mřížka
+        if self.size is not None:
+            width, height = self.size
+            grid = fit_frame(grid, width, height, self.mode)
+        self.frames.put(grid.copy())
+        self.count += 1
+
+    def close(self):
+        """Počká na zapsání všech snímků a uzavře výstup"""
+        self.frames.put(None)
+        self.thread.join()
+        self.writer.close()
+        if self.error is not None:
+            raise self.error
+
+
+def export_animation(forest, output, frames=200, stride=1, size=None, fps=10, mode="burning", max_queue=16):
+    """Zapíše frames snímků simulace forest, mezi snímky proběhne stride kroků"""
+    exporter = FrameExporter(output, size, fps, mode, max_queue)
+    try:
+        for frame in range(frames):
+            if frame:
+                for _ in range(stride):
+                    forest.update()
+            exporter.add(forest.grid)
+    finally:
+        exporter.close()
+    return exporter.count
+
+
+def main(argv=None):
+    from main import ForestFire
+
+    parser = argparse.ArgumentParser(description="Export animace modelu lesního požáru bez GUI")
+    parser.add_argument("output", help="Výstupní GIF (.gif) nebo adresář pro řadu PNG")
+    parser.add_argument("--frames", type=int, default=200, help="Počet snímků")
+    parser.add_argument("--stride", type=int, default=1, help="Počet kroků simulace mezi snímky")
+    parser.add_argument("--size", type=parse_size, default=None, help="Rozměry snímku, např. 800x800 (výchozí mřížka)")
+    parser.add_argument("--forest", type=parse_size, default=(100, 100), help="Rozměry lesa, např. 1000x1000")
+    parser.add_argument("--fps", type=float, default=10)
+    parser.add_argument("--downsample", choices=DOWNSAMPLE_MODES, default="burning",
+                        help="Zmenšení lesa většího než snímek")
+    parser.add_argument("--p", type=float, default=0.05, help="Pravděpodobnost růstu")
+    parser.add_argument("--f", type=float, default=0.001, help="Pravděpodobnost vznícení")
+    parser.add_argument("--density", type=float, default=0.5, help="Počáteční hustota stromů")
+    parser.add_argument("--burnout-prob", type=float, default=0.8, help="Pravděpodobnost vyhoření")
+    parser.add_argument("--moore", action="store_true", help="Moorovo okolí")
+    parser.add_argument("--engine", choices=ForestFire.ENGINES, default="vectorized")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    width, height = args.forest
+    forest = ForestFire(width, height, args.p, args.f, args.density, args.burnout_prob, args.moore, args.engine,
+                        seed=args.seed)
+    forest.initialize_forest(add_initial_fires=True)
+    start = time.perf_counter()
+    try:
+        count = export_animation(forest, args.output, args.frames, args.stride, args.size, args.fps, args.downsample)
+    finally:
+        forest.close()
+    elapsed = time.perf_counter() - start
+    print(f"{count} snímků za {elapsed:.2f} s ({count / elapsed:.1f} snímků/s), uloženo do {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import numpy as np
+
+# Náhodná rozhodnutí jsou určena jen (seed, krok, proud, index buňky), ne pořadím čerpání čísel.
+# Libovolná část mřížky (pás řádků, seznam buněk) proto dostane stejná rozhodnutí, ať ji počítá
+# kterýkoli engine nebo proces.
+
+# Proudy náhodných čísel pro jednotlivá rozhodnutí
+GROW = 0
+IGNITE = 1
+BURNOUT = 2
+INIT = 3  # počáteční les a ohniska
+
+# Kandidáti na růst a vznícení se losují po blocích buněk s vlastním počítadlem generátoru Philox
+BLOCK_CELLS = 1 << 20
+
+MASK64 = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+
+
+def mix64(x):
+    """Míchací funkce splitmix64 pro uint64 pole (přetečení násobení je záměrné)"""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class CounterRandom:
+    """Náhodná čísla s čítačem (Philox, hash splitmix64) pro simulaci určenou seedem"""
+
+    def __init__(self, seed):
+        self.seed = int(seed) & MASK64
+
+    def generator(self, step, stream, block):
+        # Slovo 0 čítače Philox se zvyšuje při čerpání, blok, proud a krok jsou ve vyšších slovech
+        return np.random.Generator(np.random.Philox(key=self.seed, counter=[0, block, stream, step]))
+
+    def block_candidates(self, step, stream, prob, block):
+        """Seřazené indexy buněk bloku (absolutní), každá vybraná nezávisle s pravděpodobností prob"""
+        if prob <= 0:
+            return np.zeros(0, dtype=np.int64)
+        # Mezery mezi vybranými buňkami mají geometrické rozdělení - cena odpovídá počtu vybraných buněk
+        rng = self.generator(step, stream, block)
+        expected = BLOCK_CELLS * min(prob, 1.0)
+        chunk = int(expected + 6 * np.sqrt(expected)) + 16
+        # Při velmi malé prob vrací geometric až maximum int64 a součet by přetekl do záporných hodnot.
+        # Mezera delší než blok za něj stejně vede, takže se může oříznout beze změny výsledku.
+        limit = BLOCK_CELLS + 1
+        positions = np.cumsum(np.minimum(rng.geometric(min(prob, 1.0), chunk), limit)) - 1
+        while positions[-1] < BLOCK_CELLS:
+            more = np.cumsum(np.minimum(rng.geometric(min(prob, 1.0), chunk), limit)) + positions[-1]
+            positions = np.concatenate((positions, more))
+        return positions[positions < BLOCK_CELLS] + block * BLOCK_CELLS
+
+    def candidates(self, step, stream, prob, start, stop):
+        """Seřazené indexy buněk z rozsahu start..stop-1 vybrané každá s pravděpodobností prob"""
+        if stop <= start:
+            return np.zeros(0, dtype=np.int64)
+        blocks = [self.block_candidates(step, stream, prob, block)
+                  for block in range(start // BLOCK_CELLS, (stop - 1) // BLOCK_CELLS + 1)]
+        cells = np.concatenate(blocks)
+        return cells[(cells >= start) & (cells < stop)]
+
+    def uniform(self, step, stream, cells):
+        """Rovnoměrná čísla z [0, 1) pro zadané indexy buněk (hash seedu, kroku, proudu a indexu)"""
+        key = self.seed
+        for value in (step, stream):
+            key = int(mix64(np.array([(key * GOLDEN + value + 1) & MASK64], dtype=np.uint64))[0])
+        x = np.asarray(cells, dtype=np.uint64) * np.uint64(GOLDEN) + np.uint64(key)
+        return (mix64(x) >> np.uint64(11)) * (1.0 / (1 << 53))
+
+    def mask(self, step, stream, prob, size):
+        """Booleovská maska size buněk vybraných stejně jako v candidates"""
+        mask = np.zeros(size, dtype=bool)
+        mask[self.candidates(step, stream, prob, 0, size)] = True
+        return mask
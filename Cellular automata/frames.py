@@ -0,0 +1,54 @@
+import numpy as np
+from kernels import EMPTY, BURNING
+
+# Barvy stavů jako RGB (prázdno - brown, strom - green, hoří - orange, spálený - black, stejně jako v matplotlib)
+STATE_COLORS = np.array([[165, 42, 42], [0, 128, 0], [255, 165, 0], [0, 0, 0]], dtype=np.uint8)
+
+# Způsoby zmenšení mřížky větší než zobrazovací plocha:
+# burning - blok je hořící, pokud v něm něco hoří, jinak nejčastější stav; majority - nejčastější stav bloku
+DOWNSAMPLE_MODES = ["burning", "majority"]
+
+
+def downsample(grid, factor, mode="burning"):
+    """Zmenší mřížku stavů factor-krát, každý blok factor x factor buněk nahradí jedním stavem"""
+    if factor <= 1:
+        return grid
+    height, width = grid.shape
+    rows, cols = -(-height // factor), -(-width // factor)
+    # Neúplné bloky na okraji se doplní prázdnými buňkami (nejčastějším stavem se stanou jen výjimečně)
+    if rows * factor != height or cols * factor != width:
+        padded = np.full((rows * factor, cols * factor), EMPTY, dtype=np.uint8)
+        padded[:height, :width] = grid
+        grid = padded
+    blocks = grid.reshape(rows, factor, cols, factor)
+    counts = np.stack([(blocks == state).sum(axis=(1, 3), dtype=np.int32) for state in range(len(STATE_COLORS))])
+    result = np.argmax(counts, axis=0).astype(np.uint8)
+    if mode == "burning":
+        result[counts[BURNING] > 0] = BURNING
+    elif mode != "majority":
+        raise ValueError(f"Neznámý způsob zmenšení: {mode}")
+    return result
+
+
+def fit_frame(grid, width, height, mode="burning"):
+    """Mřížka stavů přizpůsobená ploše width x height - zmenšená po blocích nebo zvětšená celým násobkem"""
+    rows, cols = grid.shape
+    factor = max(-(-rows // height), -(-cols // width))
+    if factor > 1:
+        return downsample(grid, factor, mode)
+    zoom = max(1, min(height // rows, width // cols))
+    if zoom > 1:
+        return np.repeat(np.repeat(grid, zoom, axis=0), zoom, axis=1)
+    return grid
+
+
+def ppm_data(indices):
+    """Binární PPM obrázek z mřížky stavů přes tabulku barev (pro tk.PhotoImage bez matplotlib)"""
+    height, width = indices.shape
+    return f"P6 {width} {height} 255\n".encode() + STATE_COLORS[indices].tobytes()
+
+
+def parse_size(text):
+    """Rozměry zadané jako ŠÍŘKAxVÝŠKA (např. 800x600) pro argumenty příkazové řádky"""
+    width, height = text.lower().split("x")
+    return int(width), int(height)
@@ -0,0 +1,133 @@
+import os
+import numpy as np
+from kernels import pack_grid, unpack_grid, packed_width
+
+# Hlavička datového souboru: značka a (šířka, výška, interval klíčových snímků) jako int64
+MAGIC = b"FFHIST02"
+HEADER_SIZE = len(MAGIC) + 3 * 8
+# Záznam v indexu: pozice, délka a druh záznamu kroku (int64)
+INDEX_FIELDS = 3
+RAW = 0  # celá zabalená mřížka
+DELTA = 1  # XOR s posledním klíčovým snímkem kódovaný po bězích
+
+
+def rle_encode(data):
+    """Běhy stejných bajtů - délky (uint32) a hodnoty (uint8)"""
+    starts = np.concatenate(([0], np.flatnonzero(data[1:] != data[:-1]) + 1))
+    lengths = np.diff(np.concatenate((starts, [data.size])))
+    return lengths.astype(np.uint32), data[starts]
+
+
+def rle_decode(lengths, values):
+    return np.repeat(values, lengths)
+
+
+class HistoryRecorder:
+    """Zápis průběhu simulace - po každém kroku se na konec souboru připojí zabalená mřížka (2 bity na buňku)"""
+
+    def __init__(self, path, width, height, keyframe_interval=1):
+        # S keyframe_interval > 1 je celá mřížka uložená jen v každém keyframe_interval-tém kroku (klíčový snímek),
+        # ostatní kroky jako XOR s posledním klíčovým snímkem kódovaný po bězích (RLE). Rozdíl je vždy proti
+        # klíčovému snímku, ne proti předchozímu kroku, takže libovolný krok se načte nejvýš dvěma čteními.
+        # Rozdíl se uloží jen tehdy, když je menší než celá mřížka, jinak se krok uloží celý - záznam
+        # tak nikdy nezabere víc než nekomprimovaná mřížka.
+        # Vedle dat je soubor path + ".idx" s pozicí, délkou a druhem záznamu každého kroku.
+        self.path = path
+        self.width = width
+        self.height = height
+        self.keyframe_interval = keyframe_interval
+        self.data = open(path, "wb")
+        self.index = open(path + ".idx", "wb")
+        self.data.write(MAGIC + np.array([width, height, keyframe_interval], dtype=np.int64).tobytes())
+        self.offset = HEADER_SIZE
+        self.keyframe = None
+        self.steps = 0
+
+    def record(self, cells, packed=False):
+        """Připojí další krok - kompaktní mřížku simulátoru (ForestFire.cells, u nezabalené se zabalí)"""
+        cells = cells if packed else pack_grid(cells)
+        kind = RAW
+        record = cells.tobytes()
+        if self.steps % self.keyframe_interval == 0:
+            self.keyframe = cells.copy()
+        else:
+            lengths, values = rle_encode((cells ^ self.keyframe).reshape(-1))
+            if lengths.nbytes + values.nbytes < len(record):
+                kind = DELTA
+                record = lengths.tobytes() + values.tobytes()
+        self.data.write(record)
+        self.index.write(np.array([self.offset, len(record), kind], dtype=np.int64).tobytes())
+        # Zapsané kroky jsou hned k dispozici pro čtení (HistoryReader)
+        self.data.flush()
+        self.index.flush()
+        self.offset += len(record)
+        self.steps += 1
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+
+class HistoryReader:
+    """Náhodný přístup k zaznamenaným krokům přes paměťově mapované soubory"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            header = file.read(HEADER_SIZE)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Soubor {path} není záznam simulace")
+        self.width, self.height, self.keyframe_interval = np.frombuffer(header[len(MAGIC):], dtype=np.int64).tolist()
+        self.shape = (self.height, packed_width(self.width))
+        self.data = None
+        self.index = np.zeros((0, INDEX_FIELDS), dtype=np.int64)
+        self.refresh()
+
+    def refresh(self):
+        """Namapuje soubory znovu, aby byly vidět kroky zapsané od posledního mapování"""
+        steps = os.path.getsize(self.path + ".idx") // (INDEX_FIELDS * 8)
+        if steps:
+            self.data = np.memmap(self.path, dtype=np.uint8, mode="r")
+            self.index = np.memmap(self.path + ".idx", dtype=np.int64, mode="r", shape=(steps, INDEX_FIELDS))
+
+    def __len__(self):
+        return len(self.index)
+
+    def record(self, step):
+        offset, size, kind = self.index[step]
+        return self.data[offset:offset + size], kind
+
+    def size(self):
+        """Počet bajtů všech uložených záznamů (bez hlavičky a indexu)"""
+        return int(self.index[:, 1].sum())
+
+    def cells(self, step):
+        """Zabalená mřížka kroku step"""
+        if step >= len(self):
+            self.refresh()
+        if not 0 <= step < len(self):
+            raise IndexError(f"Krok {step} není v záznamu ({len(self)} kroků)")
+        record, kind = self.record(step)
+        if kind == RAW:
+            return np.array(record).reshape(self.shape)
+        keyframe = np.array(self.record(step - step % self.keyframe_interval)[0]).reshape(self.shape)
+        runs = record.size // 5
+        lengths = record[:4 * runs].view(np.uint32)
+        values = record[4 * runs:]
+        return keyframe ^ rle_decode(lengths, values).reshape(self.shape)
+
+    def grid(self, step):
+        """Mřížka stavů kroku step jako uint8 pole (výška, šířka)"""
+        return unpack_grid(self.cells(step), self.width)
+
+
+def record_history(forest, path, steps, keyframe_interval=1):
+    """Simuluje steps kroků a zaznamená počáteční stav i stav po každém kroku"""
+    recorder = HistoryRecorder(path, forest.width, forest.height, keyframe_interval)
+    try:
+        recorder.record(forest.cells, forest.packed)
+        for _ in range(steps):
+            forest.update()
+            recorder.record(forest.cells, forest.packed)
+    finally:
+        recorder.close()
@@ -0,0 +1,190 @@
+import numpy as np
+from forest_random import GROW, IGNITE, BURNOUT
+
+EMPTY = 0
+TREE = 1
+BURNING = 2
+BURNT = 3
+
+# Přibližný počet buněk v jednom pásu při výpočtu po pásech
+BAND_CELLS = 1 << 20
+
+
+def burning_neighbors(burning, use_moore=False):
+    """Vrací masku buněk, které mají aspoň jednoho hořícího souseda"""
+    # Posunuté kopie masky hořících buněk se sečtou operací OR. Posun o jeden řádek/sloupec
+    # ořízne okraj, takže buňky mimo mřížku se nepočítají (stejně jako kontrola mezí v cyklu).
+    # Pracuje s posledními dvěma osami, první osy mohou být dávka více lesů.
+    neighbors = np.zeros_like(burning)
+    neighbors[..., 1:, :] |= burning[..., :-1, :]
+    neighbors[..., :-1, :] |= burning[..., 1:, :]
+    neighbors[..., :, 1:] |= burning[..., :, :-1]
+    neighbors[..., :, :-1] |= burning[..., :, 1:]
+    if use_moore:
+        neighbors[..., 1:, 1:] |= burning[..., :-1, :-1]
+        neighbors[..., 1:, :-1] |= burning[..., :-1, 1:]
+        neighbors[..., :-1, 1:] |= burning[..., 1:, :-1]
+        neighbors[..., :-1, :-1] |= burning[..., 1:, 1:]
+    return neighbors
+
+
+def count_transitions(counts, grown_empty, grown_burnt, ignited, burnt_out):
+    """Upraví počty buněk ve stavech (pole délky 4) podle počtů provedených přechodů"""
+    counts[EMPTY] -= grown_empty
+    counts[TREE] += grown_empty + grown_burnt - ignited
+    counts[BURNING] += ignited - burnt_out
+    counts[BURNT] += burnt_out - grown_burnt
+
+
+def apply_transitions(grid, near_fire, random_values, p, f, burnout_prob, out=None, counts=None):
+    """Provede přechody stavů podle masky hořících sousedů, každá buňka použije jedno náhodné číslo"""
+    # Buňka je v jednom stavu, takže jí stačí jedna náhodná hodnota pro přechod, který ji týká.
+    # Je-li zadané counts, upraví se v něm počty buněk ve stavech podle provedených přechodů.
+    burnt = grid == BURNT
+    empty = (grid == EMPTY) | burnt
+    tree = grid == TREE
+    burning = grid == BURNING
+
+    grow = empty & (random_values < p)
+    ignite = tree & (near_fire | (random_values < f))
+    burnout = burning & (random_values < burnout_prob)
+
+    if counts is not None:
+        grown = np.count_nonzero(grow)
+        grown_burnt = np.count_nonzero(grow & burnt)
+        count_transitions(counts, grown - grown_burnt, grown_burnt, np.count_nonzero(ignite),
+                          np.count_nonzero(burnout))
+
+    if out is None:
+        out = np.empty_like(grid)
+    np.copyto(out, grid)
+    out[grow] = TREE
+    out[ignite] = BURNING
+    out[burnout] = BURNT
+    return out
+
+
+def counter_transitions(grid, near_fire, counter, step, start, p, f, burnout_prob, out=None, counts=None):
+    """Přechody stavů s rozhodnutími z CounterRandom, grid jsou celé řádky mřížky od buňky start"""
+    # Rozhodnutí závisí jen na seedu, kroku a indexu buňky, takže nezáleží na rozdělení mřížky do pásů
+    flat = grid.reshape(-1)
+    stop = start + flat.size
+    grown = counter.candidates(step, GROW, p, start, stop) - start
+    state = flat[grown]
+    grown_burnt = state == BURNT
+    grown = grown[(state == EMPTY) | grown_burnt]
+    ignite = (grid == TREE) & near_fire
+    spontaneous = counter.candidates(step, IGNITE, f, start, stop) - start
+    spontaneous = spontaneous[(flat[spontaneous] == TREE) & ~ignite.reshape(-1)[spontaneous]]
+    burning = np.flatnonzero(flat == BURNING)
+    burnt_out = burning[counter.uniform(step, BURNOUT, burning + start) < burnout_prob]
+
+    if counts is not None:
+        burnt_count = np.count_nonzero(grown_burnt)
+        count_transitions(counts, grown.size - burnt_count, burnt_count,
+                          np.count_nonzero(ignite) + spontaneous.size, burnt_out.size)
+
+    if out is None:
+        out = np.empty_like(grid)
+    np.copyto(out, grid)
+    out_flat = out.reshape(-1)
+    out[ignite] = BURNING
+    out_flat[spontaneous] = BURNING
+    out_flat[grown] = TREE
+    out_flat[burnt_out] = BURNT
+    return out
+
+
+def step_dense(grid, random_values, p, f, burnout_prob, use_moore=False, out=None, counts=None):
+    """Jeden krok celé mřížky najednou"""
+    near_fire = burning_neighbors(grid == BURNING, use_moore)
+    return apply_transitions(grid, near_fire, random_values, p, f, burnout_prob, out, counts)
+
+
+def step_banded(cells, out, width, height, random_rows, p, f, burnout_prob, use_moore=False, packed=False,
+                band_rows=None, counts=None, counter=None, step=0, rows=None):
+    """Jeden krok po pásech řádků z bufferu cells do předalokovaného bufferu out"""
+    # Každý pás se počítá s jedním řádkem navíc nad a pod sebou (halo), takže výsledek je stejný
+    # jako u celé mřížky, ale pracovní pole (náhodná čísla, masky) mají jen velikost pásu.
+    # random_rows(y0, y1) vrací náhodná čísla pro řádky y0:y1, pásy se berou shora dolů.
+    # Se zadaným counter (CounterRandom) se místo random_rows použijí rozhodnutí pro daný krok step.
+    # rows = (první, za posledním) omezí výpočet na část řádků (pás jednoho procesu).
+    band_rows = band_rows or max(1, BAND_CELLS // width)
+    first_row, last_row = rows or (0, height)
+    for y0 in range(first_row, last_row, band_rows):
+        y1 = min(y0 + band_rows, last_row)
+        top = 1 if y0 > 0 else 0
+        bottom = 1 if y1 < height else 0
+        block = cells[y0 - top:y1 + bottom]
+        if packed:
+            block = unpack_grid(block, width)
+        near_fire = burning_neighbors(block == BURNING, use_moore)[top:top + y1 - y0]
+        band = block[top:top + y1 - y0]
+        target = None if packed else out[y0:y1]
+        if counter is not None:
+            result = counter_transitions(band, near_fire, counter, step, y0 * width, p, f, burnout_prob, target,
+                                         counts)
+        else:
+            result = apply_transitions(band, near_fire, random_rows(y0, y1), p, f, burnout_prob, target, counts)
+        if packed:
+            out[y0:y1] = pack_grid(result)
+    return out
+
+
+def packed_width(width):
+    """Počet bajtů na řádek při uložení 4 buněk do jednoho bajtu"""
+    return (width + 3) // 4
+
+
+def pack_grid(grid):
+    """Zabalí mřížku stavů 0-3 po 2 bitech, 4 buňky na bajt (řádky se doplní prázdnými buňkami)"""
+    height, width = grid.shape
+    padded = np.zeros((height, packed_width(width) * 4), dtype=np.uint8)
+    padded[:, :width] = grid
+    quads = padded.reshape(height, -1, 4)
+    return quads[..., 0] | (quads[..., 1] << 2) | (quads[..., 2] << 4) | (quads[..., 3] << 6)
+
+
+def unpack_grid(packed, width):
+    """Rozbalí mřížku zabalenou funkcí pack_grid na uint8 pole (řádky, width)"""
+    quads = np.stack([packed & 3, (packed >> 2) & 3, (packed >> 4) & 3, packed >> 6], axis=-1)
+    return quads.reshape(packed.shape[0], -1)[:, :width]
+
+
+# Počty buněk v jednotlivých stavech pro každou hodnotu zabaleného bajtu
+BYTE_COUNTS = np.array([[sum((byte >> shift) & 3 == state for shift in (0, 2, 4, 6)) for state in range(4)]
+                        for byte in range(256)], dtype=np.int64)
+
+
+def count_states(cells, width=None, packed=False):
+    """Počty buněk v jednotlivých stavech jedním průchodem přes kompaktní mřížku"""
+    if not packed:
+        return np.bincount(cells.reshape(-1), minlength=4)
+    counts = np.bincount(cells.reshape(-1), minlength=256) @ BYTE_COUNTS
+    # Doplněné buňky na konci řádků jsou prázdné a do statistiky nepatří
+    counts[EMPTY] -= cells.shape[0] * (packed_width(width) * 4 - width)
+    return counts
+
+
+class PackedCells:
+    """Přístup k zabalené mřížce přes ploché indexy buněk (pro engine sparse)"""
+
+    def __init__(self, packed, width):
+        self.packed = packed.reshape(-1)
+        self.width = width
+        self.row_bytes = packed.shape[1]
+        self.size = packed.shape[0] * width
+
+    def locate(self, cells):
+        rows, cols = np.divmod(cells, self.width)
+        return rows * self.row_bytes + cols // 4, ((cols % 4) * 2).astype(np.uint8)
+
+    def __getitem__(self, cells):
+        index, shift = self.locate(cells)
+        return (self.packed[index] >> shift) & 3
+
+    def __setitem__(self, cells, value):
+        # Více buněk může ležet ve stejném bajtu, proto ufunc.at místo prostého přiřazení
+        index, shift = self.locate(cells)
+        np.bitwise_and.at(self.packed, index, ~(np.uint8(3) << shift))
+        np.bitwise_or.at(self.packed, index, np.uint8(value) << shift)
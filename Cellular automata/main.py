@@ -1,19 +1,32 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-import matplotlib.colors as mcolors
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import os
 import sys
+import time
+import threading
+import shutil
+import tempfile
+from kernels import step_banded, pack_grid, unpack_grid, packed_width, count_states, PackedCells, BAND_CELLS
+from sparse import step_sparse
+from population import PopulationSeries
+from forest_random import CounterRandom, GROW, IGNITE, BURNOUT, INIT
+from parallel import ParallelStepper
+from frames import fit_frame, ppm_data, DOWNSAMPLE_MODES
+from export import export_animation
+from history import HistoryRecorder, HistoryReader
 
 class ForestFire:
     EMPTY = 0
     TREE = 1
     BURNING = 2
     BURNT = 3
+    ENGINES = ["vectorized", "sparse", "loop", "parallel"]
     
-    def __init__(self, width=100, height=100, p=0.05, f=0.001, density=0.5, burnout_prob=0.8, use_moore=False):
+    def __init__(self, width=100, height=100, p=0.05, f=0.001, density=0.5, burnout_prob=0.8, use_moore=False,
+                 engine="vectorized", packed=False, series_capacity=None, seed=None, workers=None):
         self.width = width
         self.height = height
         self.p = p  # pravděpodobnost růstu nového stromu
@@ -21,49 +34,195 @@ class ForestFire:
         self.density = density  # hustota stromů při inicializaci
         self.burnout_prob = burnout_prob  # pravděpodobnost vyhoření hořícího stromu
         self.use_moore = use_moore  # použití Moorova okolí (8 sousedů)
-        self.grid = np.zeros((height, width), dtype=int)
+        self.engine = engine  # způsob výpočtu kroku (viz ENGINES)
+        self.packed = packed  # uložení 4 buněk do jednoho bajtu (2 bity na buňku)
+        self.burning_cells = None  # seřazené indexy hořících buněk pro engine sparse (None = sestavit z mřížky)
+        self.counts = np.zeros(4, dtype=np.int64)  # počty buněk ve stavech, průběžně upravované v kroku
+        self.step_count = 0
+        # Volitelný záznam počtů po každém kroku (kruhový buffer pro graf populace)
+        self.series = PopulationSeries(series_capacity) if series_capacity else None
+        # Se seedem určuje náhodná rozhodnutí jen (seed, krok, buňka) - všechny enginy pak dávají stejný průběh
+        self.counter = CounterRandom(seed) if seed is not None else None
+        self.workers = workers or os.cpu_count() or 1  # počet procesů enginu parallel
+        self.stepper = None  # procesy enginu parallel, spouští se při prvním kroku
+        # Dva předalokované buffery - krok zapisuje do next_cells a pak se prohodí
+        shape = (height, packed_width(width)) if packed else (height, width)
+        self.cells = np.zeros(shape, dtype=np.uint8)
+        self.next_cells = np.zeros(shape, dtype=np.uint8)
         self.initialize_forest()
+
+    @property
+    def grid(self):
+        """Mřížka stavů jako uint8 pole (u zabaleného uložení rozbalená kopie)"""
+        if self.packed:
+            return unpack_grid(self.cells, self.width)
+        return self.cells
+
+    @grid.setter
+    def grid(self, grid):
+        """Nastaví stav lesa z pole stavů"""
+        grid = np.asarray(grid, dtype=np.uint8)
+        self.cells[:] = pack_grid(grid) if self.packed else grid
+        self.burning_cells = None
+        self.counts = count_states(self.cells, self.width, self.packed)
+
+    def cell_view(self):
+        """Plochý přístup k buňkám kompaktní mřížky (index = řádek * width + sloupec)"""
+        if self.packed:
+            return PackedCells(self.cells, self.width)
+        return self.cells.reshape(-1)
         
     def initialize_forest(self, add_initial_fires=False):
         """Inicializuje les s danou hustotou stromů"""
-        self.grid = np.zeros((self.height, self.width), dtype=int)
-        random_values = np.random.random((self.height, self.width))
-        self.grid = np.where(random_values < self.density, self.TREE, self.EMPTY)
+        # Po pásech řádků, aby se pro velké lesy nealokovalo celé pole náhodných čísel najednou
+        band_rows = max(1, BAND_CELLS // self.width)
+        for y0 in range(0, self.height, band_rows):
+            y1 = min(y0 + band_rows, self.height)
+            if self.counter is not None:
+                cells = np.arange(y0 * self.width, y1 * self.width)
+                random_values = self.counter.uniform(0, INIT, cells).reshape(y1 - y0, self.width)
+            else:
+                random_values = np.random.random((y1 - y0, self.width))
+            band = np.where(random_values < self.density, self.TREE, self.EMPTY).astype(np.uint8)
+            self.cells[y0:y1] = pack_grid(band) if self.packed else band
+        self.burning_cells = None
+        self.counts = count_states(self.cells, self.width, self.packed)
 
         if add_initial_fires:
-            for _ in range(3):
-                i, j = np.random.randint(0, self.height), np.random.randint(0, self.width)
-                if self.grid[i, j] == self.TREE:
-                    self.grid[i, j] = self.BURNING
+            cells = self.cell_view()
+            if self.counter is not None:
+                rng = self.counter.generator(0, INIT, 0)
+                fires = [(rng.integers(self.height), rng.integers(self.width)) for _ in range(3)]
+            else:
+                fires = [(np.random.randint(0, self.height), np.random.randint(0, self.width)) for _ in range(3)]
+            for i, j in fires:
+                if cells[i * self.width + j] == self.TREE:
+                    cells[i * self.width + j] = self.BURNING
+                    self.counts[self.TREE] -= 1
+                    self.counts[self.BURNING] += 1
+
+        self.step_count = 0
+        if self.series is not None:
+            self.series.clear()
+            self.series.record(0, self.counts)
     
     def update(self):
         """Aktualizuje stav lesa podle pravidel"""
-        new_grid = np.copy(self.grid)
+        # Vrací kompaktní mřížku (u zabaleného uložení zabalené bajty)
+        if self.engine == "vectorized":
+            cells = self.update_vectorized()
+        elif self.engine == "sparse":
+            cells = self.update_sparse()
+        elif self.engine == "loop":
+            cells = self.update_loop()
+        elif self.engine == "parallel":
+            cells = self.update_parallel()
+        else:
+            raise ValueError(f"Neznámý engine: {self.engine}")
+
+        self.step_count += 1
+        if self.series is not None:
+            self.series.record(self.step_count, self.counts)
+        return cells
+
+    def update_vectorized(self):
+        """Aktualizuje celou mřížku po pásech řádků operacemi NumPy"""
+        step_banded(self.cells, self.next_cells, self.width, self.height,
+                    lambda y0, y1: np.random.random((y1 - y0, self.width)),
+                    self.p, self.f, self.burnout_prob, self.use_moore, self.packed, counts=self.counts,
+                    counter=self.counter, step=self.step_count)
+        self.cells, self.next_cells = self.next_cells, self.cells
+        self.burning_cells = None
+        return self.cells
+
+    def update_parallel(self):
+        """Aktualizuje mřížku po vodorovných pásech ve více procesech nad sdílenou pamětí"""
+        # Výsledek je stejný jako u enginu vectorized se stejným seedem
+        if self.counter is None:
+            raise ValueError("Engine parallel vyžaduje seed")
+        if self.stepper is None:
+            self.stepper = ParallelStepper(self.cells.shape, self.width, self.height, self.packed,
+                                           self.counter.seed, self.workers)
+            np.copyto(self.stepper.buffers[0], self.cells)
+            self.cells, self.next_cells = self.stepper.buffers
+        source = 0 if self.cells is self.stepper.buffers[0] else 1
+        try:
+            deltas = self.stepper.step(source, self.step_count, self.p, self.f, self.burnout_prob, self.use_moore)
+        except RuntimeError:
+            # Procesy jsou ukončené, mřížka zůstane ve stavu před tímto krokem
+            self.close()
+            raise
+        self.counts += deltas
+        self.cells, self.next_cells = self.next_cells, self.cells
+        self.burning_cells = None
+        return self.cells
+
+    def close(self):
+        """Ukončí procesy enginu parallel, mřížka se přesune zpět do paměti procesu"""
+        if self.stepper is not None:
+            self.cells = self.cells.copy()
+            self.next_cells = np.empty_like(self.cells)
+            self.stepper.close()
+            self.stepper = None
+
+    def update_sparse(self):
+        """Aktualizuje jen hořící buňky, jejich sousedy a náhodně vylosované buňky"""
+        # Cena kroku závisí na aktivitě (počet hořících a nově rostoucích/vznícených stromů),
+        # ne na velikosti mřížky - vhodné pro velké lesy s malým f
+        if self.burning_cells is None:
+            self.burning_cells = np.flatnonzero(self.grid == self.BURNING)
+        self.burning_cells = step_sparse(self.cell_view(), self.burning_cells, self.width, self.height,
+                                         self.p, self.f, self.burnout_prob, self.use_moore, self.counts,
+                                         self.counter, self.step_count)
+        return self.cells
+
+    def update_loop(self):
+        """Aktualizuje stav lesa po jednotlivých buňkách (původní výpočet)"""
+        grid = self.grid
+        new_grid = np.copy(grid)
+
+        if self.counter is not None:
+            # Rozhodnutí všech buněk pro tento krok z generátoru s čítačem, stejná jako u ostatních enginů
+            size = self.width * self.height
+            shape = (self.height, self.width)
+            grow = self.counter.mask(self.step_count, GROW, self.p, size).reshape(shape)
+            ignite = self.counter.mask(self.step_count, IGNITE, self.f, size).reshape(shape)
+            burnout = self.counter.uniform(self.step_count, BURNOUT, np.arange(size)).reshape(shape) < self.burnout_prob
+            grows = lambda i, j: grow[i, j]
+            ignites = lambda i, j: ignite[i, j]
+            burns_out = lambda i, j: burnout[i, j]
+        else:
+            grows = lambda i, j: np.random.random() < self.p
+            ignites = lambda i, j: np.random.random() < self.f
+            burns_out = lambda i, j: np.random.random() < self.burnout_prob
 
         for i in range(self.height):
             for j in range(self.width):
-                cell_state = self.grid[i, j]
+                cell_state = grid[i, j]
                 
                 if cell_state == self.EMPTY or cell_state == self.BURNT:
                     # Pravděpodobnost, že na prázdném místě nebo spáleném místě vyroste nový strom
-                    if np.random.random() < self.p:
+                    if grows(i, j):
                         new_grid[i, j] = self.TREE
 
                 elif cell_state == self.TREE:
                     # Buď se strom vznítí od souseda, nebo spontánně
-                    if self.has_burning_neighbor(i, j) or np.random.random() < self.f:
+                    if self.has_burning_neighbor(i, j, grid) or ignites(i, j):
                         new_grid[i, j] = self.BURNING
 
                 elif cell_state == self.BURNING:
                     # Hořící strom má určitou pravděpodobnost vyhoření
-                    if np.random.random() < self.burnout_prob:
+                    if burns_out(i, j):
                         new_grid[i, j] = self.BURNT
 
+        # Mřížka se nastaví celá najednou, setter při tom přepočítá i počty stavů
         self.grid = new_grid
-        return self.grid
+        return self.cells
     
-    def has_burning_neighbor(self, i, j):
+    def has_burning_neighbor(self, i, j, grid=None):
         """Kontroluje, zda má buňka hořícího souseda"""
+        if grid is None:
+            grid = self.grid
         if self.use_moore:
             # Moorovo okolí (8 směrů)
             for di in [-1, 0, 1]:
@@ -71,47 +230,32 @@ class ForestFire:
                     if di == 0 and dj == 0:
                         continue
                     ni, nj = i + di, j + dj
-                    if 0 <= ni < self.height and 0 <= nj < self.width and self.grid[ni, nj] == self.BURNING:
+                    if 0 <= ni < self.height and 0 <= nj < self.width and grid[ni, nj] == self.BURNING:
                         return True
         else:
             # Von Neumannovo okolí (4 směry)
             neighbors = [(i-1, j), (i+1, j), (i, j-1), (i, j+1)]
             for ni, nj in neighbors:
-                if 0 <= ni < self.height and 0 <= nj < self.width and self.grid[ni, nj] == self.BURNING:
+                if 0 <= ni < self.height and 0 <= nj < self.width and grid[ni, nj] == self.BURNING:
                     return True
         return False
     
     def get_stats(self):
         """Vrací statistiky o aktuálním stavu lesa"""
+        # Počty stavů se udržují průběžně při přechodech, mřížka se neprochází
         total_cells = self.width * self.height
-        tree_count = np.sum(self.grid == self.TREE)
-        burning_count = np.sum(self.grid == self.BURNING)
-        burnt_count = np.sum(self.grid == self.BURNT)
         
         return {
-            "tree": tree_count / total_cells,
-            "burning": burning_count / total_cells,
-            "burnt": burnt_count / total_cells
+            "tree": self.counts[self.TREE] / total_cells,
+            "burning": self.counts[self.BURNING] / total_cells,
+            "burnt": self.counts[self.BURNT] / total_cells
         }
 
-    def save_animation(self, gif_filename='forest_fire.gif', frames=200):
+    def save_animation(self, gif_filename='forest_fire.gif', frames=200, stride=1, size=(800, 800)):
         """Uloží animaci simulace jako GIF soubor"""
-        colors = ['brown', 'green', 'orange', 'black']
-        cmap = mcolors.ListedColormap(colors)
-        
-        fig, ax = plt.figure(figsize=(8, 8)), plt.axes()
-        ax.set_title('Model lesního požáru')
-        img = ax.imshow(self.grid, cmap=cmap, vmin=0, vmax=3)
-
-        def animate(frame):
-            self.update()
-            img.set_array(self.grid)
-            return [img]
-        
-        anim = FuncAnimation(fig, animate, frames=frames, interval=100, blit=True)
-        anim.save(gif_filename, writer='pillow')
+        # Snímky jdou z mřížky přímo do obrázku s paletou a zapisují se průběžně ve vlákně na pozadí
+        export_animation(self, gif_filename, frames, stride, size, fps=10)
         print(f"Animace uložena jako {gif_filename}")
-        plt.close(fig)
 
 
 class ForestFireSimulatorGUI:
@@ -128,7 +272,21 @@ class ForestFireSimulatorGUI:
         self.burnout_prob = 0.8
         self.update_interval = 100  # ms
         self.use_moore = False
+        self.engine = "vectorized"
+        self.chart_steps = 500  # počet posledních kroků v grafu populace
+        self.frame_interval = 40  # ms, nejkratší interval mezi zobrazenými snímky
+        self.chart_interval = 0.5  # s, interval překreslení grafu populace
+        self.downsample_mode = "burning"  # zmenšení mřížky větší než zobrazovací plocha
         self.running = False
+        self.pending_steps = 0.0  # kroky simulace, které mají proběhnout před dalším snímkem
+        self.last_tick = 0.0
+        self.last_chart = 0.0
+        # Průběh simulace se zaznamenává do dočasného souboru, posuvník časové osy z něj zobrazí libovolný krok
+        self.history_dir = tempfile.mkdtemp(prefix="forest_fire_")
+        self.keyframe_interval = 10  # každý 10. krok celá mřížka, ostatní jako rozdíl proti ní (je-li menší)
+        self.history_runs = 0
+        self.recorder = None
+        self.history = None
         
         self.simulator = ForestFire(
             width=self.width, 
@@ -137,8 +295,11 @@ class ForestFireSimulatorGUI:
             f=self.ignition_prob, 
             density=self.density,
             burnout_prob=self.burnout_prob,
-            use_moore=self.use_moore
+            use_moore=self.use_moore,
+            engine=self.engine,
+            series_capacity=self.chart_steps
         )
+        self.start_history()
         
         self.setup_gui()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -146,8 +307,24 @@ class ForestFireSimulatorGUI:
     def on_closing(self):
         """Zastaví simulaci a zavře aplikaci"""
         self.running = False
+        self.recorder.close()
+        self.history = None
+        shutil.rmtree(self.history_dir, ignore_errors=True)
         self.root.destroy()
         sys.exit(0)
+
+    def start_history(self):
+        """Začne nový záznam průběhu simulace (předchozí záznam se smaže)"""
+        if self.recorder is not None:
+            self.recorder.close()
+            self.history = None
+            os.remove(self.recorder.path)
+            os.remove(self.recorder.path + ".idx")
+        self.history_runs += 1
+        path = os.path.join(self.history_dir, f"history_{self.history_runs}.bin")
+        self.recorder = HistoryRecorder(path, self.simulator.width, self.simulator.height, self.keyframe_interval)
+        self.recorder.record(self.simulator.cells, self.simulator.packed)
+        self.history = HistoryReader(path)
         
     def setup_gui(self):
         # Hlavní rozložení
@@ -181,6 +358,28 @@ class ForestFireSimulatorGUI:
             command=self.toggle_moore
         )
         self.moore_check.pack(anchor=tk.W, pady=10)
+
+        # Výběr výpočetního enginu
+        engine_frame = ttk.Frame(self.control_frame)
+        engine_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(engine_frame, text="Engine:").pack(side=tk.LEFT)
+        self.engine_var = tk.StringVar(value=self.engine)
+        # Engine parallel (procesy nad sdílenou pamětí) se vyplatí až u velkých mřížek, v GUI se nenabízí
+        engines = [engine for engine in ForestFire.ENGINES if engine != "parallel"]
+        engine_combo = ttk.Combobox(engine_frame, textvariable=self.engine_var, values=engines,
+                                    state="readonly", width=12)
+        engine_combo.pack(side=tk.LEFT, padx=5)
+        engine_combo.bind("<<ComboboxSelected>>", self.change_engine)
+
+        # Výběr zmenšení velkých mřížek pro zobrazení
+        downsample_frame = ttk.Frame(self.control_frame)
+        downsample_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(downsample_frame, text="Zmenšení:").pack(side=tk.LEFT)
+        self.downsample_var = tk.StringVar(value=self.downsample_mode)
+        downsample_combo = ttk.Combobox(downsample_frame, textvariable=self.downsample_var, values=DOWNSAMPLE_MODES,
+                                        state="readonly", width=12)
+        downsample_combo.pack(side=tk.LEFT, padx=5)
+        downsample_combo.bind("<<ComboboxSelected>>", self.change_downsample)
         
         # Tlačítka
         self.button_frame = ttk.Frame(self.control_frame)
@@ -241,19 +440,53 @@ class ForestFireSimulatorGUI:
         callback(value)
         
     def setup_plot(self):
-        """Nastaví graf pro zobrazení simulace"""
-        self.fig = plt.Figure(figsize=(6, 6), dpi=100)
-        self.ax = self.fig.add_subplot(111)
-        self.ax.set_title("Model lesního požáru")
-        
+        """Nastaví zobrazení simulace a graf populace"""
+        # Mřížka se kreslí přes tabulku barev přímo do tk.PhotoImage, matplotlib kreslí jen graf populace
+        ttk.Label(self.plot_frame, text="Model lesního požáru", font=("Arial", 12)).pack(side=tk.TOP)
+        self.grid_label = tk.Label(self.plot_frame, bg="white")
+        self.grid_label.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.photo = None
+
+        # Časová osa - po zastavení simulace lze posuvníkem zobrazit libovolný zaznamenaný krok
+        timeline_frame = ttk.Frame(self.plot_frame)
+        timeline_frame.pack(side=tk.TOP, fill=tk.X, padx=10)
+        self.step_var = tk.StringVar(value="Krok: 0")
+        ttk.Label(timeline_frame, textvariable=self.step_var, width=18).pack(side=tk.RIGHT)
+        self.timeline = ttk.Scale(timeline_frame, from_=0, to=0, command=self.seek_history)
+        self.timeline.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
         colors = ['brown', 'green', 'orange', 'black']  # prázdno, strom, hoří, spálený
-        self.cmap = mcolors.ListedColormap(colors)
-        
-        self.img = self.ax.imshow(self.simulator.grid, cmap=self.cmap, vmin=0, vmax=3)
+        self.fig = plt.Figure(figsize=(6, 1.8), dpi=100)
+        self.fig.subplots_adjust(left=0.1, right=0.98, bottom=0.15, top=0.95)
+
+        # Graf populace z časové řady simulátoru (bez procházení mřížky)
+        self.chart_ax = self.fig.add_subplot(111)
+        self.chart_ax.set_ylim(0, 1)
+        self.chart_ax.set_ylabel("Podíl buněk")
+        self.chart_lines = [
+            self.chart_ax.plot([], [], color=colors[state], label=label)[0]
+            for state, label in [(ForestFire.TREE, "Stromy"), (ForestFire.BURNING, "Hořící"),
+                                 (ForestFire.BURNT, "Spálené")]
+        ]
+        self.chart_ax.legend(loc="upper left", fontsize=8)
+        self.update_chart()
         
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.plot_frame)
         self.canvas.draw()
-        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.canvas.get_tk_widget().pack(side=tk.BOTTOM, fill=tk.X)
+        self.draw_frame()
+
+    def draw_frame(self, grid=None):
+        """Zobrazí mřížku (výchozí aktuální) zmenšenou nebo zvětšenou na velikost zobrazovací plochy"""
+        if grid is None:
+            grid = self.simulator.grid
+        width, height = self.grid_label.winfo_width(), self.grid_label.winfo_height()
+        if width <= 1 or height <= 1:
+            # Plocha ještě nemá rozměry (okno není zobrazené)
+            width, height = 650, 400
+        frame = fit_frame(grid, width, height, self.downsample_mode)
+        self.photo = tk.PhotoImage(data=ppm_data(frame), format="PPM")
+        self.grid_label.configure(image=self.photo)
         
     def update_density(self, value):
         """Aktualizuje hustotu lesa"""
@@ -283,15 +516,69 @@ class ForestFireSimulatorGUI:
         self.use_moore = self.moore_var.get()
         self.simulator.use_moore = self.use_moore
         
+    def change_engine(self, event):
+        """Přepne výpočetní engine, stav lesa zůstane zachován"""
+        self.engine = self.engine_var.get()
+        self.simulator.engine = self.engine
+
+    def change_downsample(self, event):
+        """Přepne způsob zmenšení velkých mřížek"""
+        self.downsample_mode = self.downsample_var.get()
+        self.draw_frame()
+
     def update_simulation(self):
         """Aktualizuje simulaci a zobrazení"""
+        # Simulace běží rychlostí jeden krok za update_interval ms nezávisle na zobrazení. Snímek se
+        # kreslí nejvýš jednou za frame_interval ms, při rychlejší simulaci proběhne mezi snímky více kroků.
+        # Kroky před jedním snímkem nezaberou víc než frame_interval, aby GUI zůstalo ovladatelné.
         if self.running:
-            self.simulator.update()
-            self.img.set_array(self.simulator.grid)
-            self.canvas.draw()
+            now = time.perf_counter()
+            self.pending_steps += (now - self.last_tick) * 1000 / self.update_interval
+            self.last_tick = now
+            deadline = now + self.frame_interval / 1000
+            steps = 0
+            while self.pending_steps >= 1 and (steps == 0 or time.perf_counter() < deadline):
+                self.simulator.update()
+                self.recorder.record(self.simulator.cells, self.simulator.packed)
+                self.pending_steps -= 1
+                steps += 1
+            # Kroky, které simulace nestihla, se zahodí - běží pak tak rychle, jak to jde
+            self.pending_steps = min(self.pending_steps, 1.0)
+
+            self.draw_frame()
+            self.update_timeline()
+            if now - self.last_chart >= self.chart_interval:
+                self.update_chart()
+                self.canvas.draw_idle()
+                self.last_chart = now
             self.update_stats()
-            self.root.after(self.update_interval, self.update_simulation)
+            self.root.after(max(self.update_interval, self.frame_interval), self.update_simulation)
             
+    def update_timeline(self):
+        """Posune časovou osu na poslední zaznamenaný krok"""
+        last_step = self.recorder.steps - 1
+        self.timeline.configure(to=last_step)
+        self.timeline.set(last_step)
+        self.step_var.set(f"Krok: {last_step}")
+
+    def seek_history(self, value):
+        """Zobrazí zaznamenaný krok vybraný na časové ose (jen při zastavené simulaci)"""
+        # Načte klíčový snímek a nejvýš jeden rozdíl, nezávisle na tom, jak daleko krok je.
+        # Po spuštění simulace pokračuje od aktuálního stavu, ne od zobrazeného kroku.
+        if self.running:
+            return
+        step = min(int(round(float(value))), self.recorder.steps - 1)
+        self.step_var.set(f"Krok: {step} / {self.recorder.steps - 1}")
+        self.draw_frame(self.history.grid(step))
+
+    def update_chart(self):
+        """Překreslí graf populace z kruhového bufferu simulátoru"""
+        steps, counts = self.simulator.series.series()
+        fractions = counts / (self.simulator.width * self.simulator.height)
+        for line, state in zip(self.chart_lines, [ForestFire.TREE, ForestFire.BURNING, ForestFire.BURNT]):
+            line.set_data(steps, fractions[:, state])
+        self.chart_ax.set_xlim(steps[0], max(steps[-1], steps[0] + 1))
+
     def update_stats(self):
         """Aktualizuje statistiky o lese"""
         stats = self.simulator.get_stats()
@@ -306,6 +593,8 @@ class ForestFireSimulatorGUI:
         self.running = not self.running
         if self.running:
             self.start_button.config(text="Stop")
+            self.pending_steps = 1.0
+            self.last_tick = time.perf_counter()
             self.update_simulation()
         else:
             self.start_button.config(text="Start")
@@ -319,19 +608,21 @@ class ForestFireSimulatorGUI:
             f=self.ignition_prob, 
             density=self.density,
             burnout_prob=self.burnout_prob,
-            use_moore=self.use_moore
+            use_moore=self.use_moore,
+            engine=self.engine,
+            series_capacity=self.chart_steps
         )
         self.simulator.initialize_forest()
-        self.img.set_array(self.simulator.grid)
+        self.start_history()
+        self.draw_frame()
+        self.update_timeline()
+        self.update_chart()
         self.canvas.draw()
         self.update_stats()
         
     def save_gif(self):
         """Uloží animaci jako GIF soubor"""
-        was_running = self.running
-        if was_running:
-            self.toggle_simulation()
-            
+        # Animace se počítá na samostatném simulátoru ve vlákně na pozadí, GUI mezitím běží dál
         temp_simulator = ForestFire(
             width=self.width,
             height=self.height,
@@ -339,13 +630,34 @@ class ForestFireSimulatorGUI:
             f=self.ignition_prob,
             density=self.density,
             burnout_prob=self.burnout_prob,
-            use_moore=self.use_moore
+            use_moore=self.use_moore,
+            engine=self.engine
         )
         temp_simulator.initialize_forest(add_initial_fires=True)
-        temp_simulator.save_animation(gif_filename="screens/forest_fire_simulation.gif")
-        
-        if was_running:
-            self.toggle_simulation()
+        self.save_button.config(state=tk.DISABLED)
+        self.export_error = None
+        self.export_thread = threading.Thread(target=self.run_export, daemon=True,
+                                              args=(temp_simulator, "screens/forest_fire_simulation.gif"))
+        self.export_thread.start()
+        self.root.after(200, self.check_export)
+
+    def run_export(self, simulator, gif_filename):
+        """Tělo vlákna exportu, výjimku si uloží pro hlavní vlákno (tkinter se z vlákna volat nesmí)"""
+        try:
+            os.makedirs(os.path.dirname(gif_filename), exist_ok=True)
+            simulator.save_animation(gif_filename=gif_filename)
+        except Exception as error:
+            self.export_error = error
+
+    def check_export(self):
+        """Po dokončení ukládání animace znovu povolí tlačítko a případně ohlásí chybu"""
+        if self.export_thread.is_alive():
+            self.root.after(200, self.check_export)
+            return
+        self.save_button.config(state=tk.NORMAL)
+        if self.export_error is not None:
+            self.stats_var.set(f"Uložení animace selhalo: {self.export_error}")
+            messagebox.showerror("Chyba exportu", f"Animaci se nepodařilo uložit:\n{self.export_error}")
 
 
 def main():
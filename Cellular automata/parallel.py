@@ -0,0 +1,132 @@
+import multiprocessing
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+import numpy as np
+from kernels import step_banded
+from forest_random import CounterRandom
+
+
+def split_rows(height, workers):
+    """Rozdělí řádky mřížky na workers souvislých pásů (první, za posledním)"""
+    edges = np.linspace(0, height, workers + 1).astype(int)
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+def _attach(name, shape, dtype):
+    memory = shared_memory.SharedMemory(name=name)
+    return memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+
+def _band_worker(names, shape, width, height, packed, seed, rows, index, workers, connection):
+    # Proces počítá jen svůj pás řádků. Na zprávu s parametry kroku čte zdrojový buffer včetně jednoho
+    # řádku sousedních pásů nad a pod sebou (halo), zapisuje jen do svých řádků cílového bufferu
+    # a odpoví. Další krok přijde až po odpovědi všech procesů, takže halo jsou vždy aktuální.
+    memories = []
+    buffers = []
+    for name in names[:2]:
+        memory, array = _attach(name, shape, np.uint8)
+        memories.append(memory)
+        buffers.append(array)
+    memory, counts = _attach(names[2], (workers, 4), np.int64)
+    memories.append(memory)
+    counter = CounterRandom(seed)
+
+    try:
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                # Hlavní proces skončil
+                break
+            if message is None:
+                break
+            source, step, p, f, burnout_prob, use_moore = message
+            counts[index] = 0
+            step_banded(buffers[source], buffers[1 - source], width, height, None, p, f, burnout_prob, use_moore,
+                        packed, counts=counts[index], counter=counter, step=step, rows=rows)
+            connection.send(True)
+    finally:
+        del buffers, counts
+        for memory in memories:
+            memory.close()
+
+
+class ParallelStepper:
+    """Procesy počítající krok mřížky po vodorovných pásech ve sdílené paměti"""
+
+    def __init__(self, shape, width, height, packed, seed, workers):
+        self.workers = workers
+        self.memories = [
+            shared_memory.SharedMemory(create=True, size=int(np.prod(shape))),
+            shared_memory.SharedMemory(create=True, size=int(np.prod(shape))),
+            shared_memory.SharedMemory(create=True, size=workers * 4 * 8),
+        ]
+        # Dva buffery mřížky - krok čte z jednoho a zapisuje do druhého
+        self.buffers = [np.ndarray(shape, dtype=np.uint8, buffer=memory.buf) for memory in self.memories[:2]]
+        self.counts = np.ndarray((workers, 4), dtype=np.int64, buffer=self.memories[2].buf)
+
+        # Každý proces má vlastní rouru. Na odpovědi se čeká spolu s příznaky ukončení procesů
+        # (sentinel), takže spadlý nebo zabitý proces čekání vždy přeruší - sdílená bariéra by
+        # mohla zůstat zablokovaná, pokud proces zemře uvnitř jejího zámku.
+        context = multiprocessing.get_context("spawn")
+        names = [memory.name for memory in self.memories]
+        self.connections = []
+        self.processes = []
+        for index, rows in enumerate(split_rows(height, workers)):
+            connection, child_connection = context.Pipe()
+            process = context.Process(target=_band_worker, daemon=True,
+                                      args=(names, shape, width, height, packed, seed, rows, index, workers,
+                                            child_connection))
+            process.start()
+            child_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+        self.failed = False
+
+    def _fail(self):
+        self.failed = True
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            process.join()
+        codes = [process.exitcode for process in self.processes]
+        raise RuntimeError(f"Proces enginu parallel selhal (návratové kódy procesů: {codes})")
+
+    def step(self, source, step, p, f, burnout_prob, use_moore):
+        """Jeden krok z buffers[source] do druhého bufferu, vrací změny počtů buněk ve stavech"""
+        message = (source, step, p, f, burnout_prob, bool(use_moore))
+        try:
+            for connection in self.connections:
+                connection.send(message)
+            pending = set(self.connections)
+            sentinels = {process.sentinel for process in self.processes}
+            while pending:
+                for ready in wait(list(pending) + list(sentinels)):
+                    if ready in sentinels:
+                        self._fail()
+                    ready.recv()
+                    pending.discard(ready)
+        except (EOFError, OSError):
+            self._fail()
+        return self.counts.sum(axis=0)
+
+    def close(self):
+        """Ukončí procesy a uvolní sdílenou paměť"""
+        if not self.failed:
+            for connection in self.connections:
+                try:
+                    connection.send(None)
+                except OSError:
+                    pass
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for connection in self.connections:
+            connection.close()
+        del self.buffers, self.counts
+        for memory in self.memories:
+            memory.close()
+            memory.unlink()
@@ -0,0 +1,32 @@
+import numpy as np
+
+
+class PopulationSeries:
+    """Časová řada počtů buněk v jednotlivých stavech v předalokovaném kruhovém bufferu"""
+
+    def __init__(self, capacity):
+        # Při zaplnění se přepisují nejstarší záznamy, během simulace se nic nealokuje
+        self.capacity = capacity
+        self.steps = np.zeros(capacity, dtype=np.int64)
+        self.counts = np.zeros((capacity, 4), dtype=np.int64)
+        self.recorded = 0  # celkový počet zaznamenaných kroků
+
+    def __len__(self):
+        return min(self.recorded, self.capacity)
+
+    def clear(self):
+        self.recorded = 0
+
+    def record(self, step, counts):
+        index = self.recorded % self.capacity
+        self.steps[index] = step
+        self.counts[index] = counts
+        self.recorded += 1
+
+    def series(self):
+        """Vrací (kroky, počty) seřazené od nejstaršího záznamu, počty mají tvar (záznamy, 4)"""
+        if self.recorded <= self.capacity:
+            return self.steps[:self.recorded], self.counts[:self.recorded]
+        start = self.recorded % self.capacity
+        return (np.concatenate((self.steps[start:], self.steps[:start])),
+                np.concatenate((self.counts[start:], self.counts[:start])))
@@ -0,0 +1,68 @@
+import numpy as np
+from kernels import EMPTY, TREE, BURNING, BURNT, count_transitions
+from forest_random import GROW, IGNITE, BURNOUT
+
+VON_NEUMANN_OFFSETS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+MOORE_OFFSETS = [(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if (di, dj) != (0, 0)]
+
+
+def neighbor_indices(cells, width, height, use_moore=False):
+    """Vrací ploché indexy všech sousedů zadaných buněk uvnitř mřížky (s opakováním)"""
+    rows, cols = np.divmod(cells, width)
+    result = []
+    for di, dj in MOORE_OFFSETS if use_moore else VON_NEUMANN_OFFSETS:
+        r = rows + di
+        c = cols + dj
+        valid = (r >= 0) & (r < height) & (c >= 0) & (c < width)
+        result.append(r[valid] * width + c[valid])
+    return np.concatenate(result) if result else np.zeros(0, dtype=np.int64)
+
+
+def random_subset(n, k):
+    """Vrací k různých náhodných indexů z rozsahu 0..n-1 (seřazené)"""
+    if k > n // 2:
+        return np.sort(np.random.permutation(n)[:k])
+    # Pro malé k se losuje s opakováním a chybějící indexy se dolosují - O(k log k), ne O(n)
+    chosen = np.unique(np.random.randint(0, n, k))
+    while chosen.size < k:
+        chosen = np.union1d(chosen, np.random.randint(0, n, k - chosen.size))
+    return chosen
+
+
+def sample_cells(n, prob):
+    """Každá z n buněk je vybraná nezávisle s pravděpodobností prob"""
+    # Počet vybraných buněk má binomické rozdělení, samotné buňky jsou pak náhodná k-prvková podmnožina
+    return random_subset(n, np.random.binomial(n, prob))
+
+
+def step_sparse(flat, burning, width, height, p, f, burnout_prob, use_moore=False, counts=None, counter=None, step=0):
+    """Jeden krok jen přes buňky, kterých se něco týká - hořící, jejich sousedé a vylosované buňky"""
+    # flat je plochý pohled na mřížku (mění se na místě), burning seřazené indexy hořících buněk.
+    # Všechna rozhodnutí se dělají podle starého stavu a zapisují se až nakonec, jako u synchronního kroku.
+    # Je-li zadané counts, upraví se v něm počty buněk ve stavech podle provedených přechodů.
+    # Se zadaným counter (CounterRandom) se rozhoduje stejně jako u ostatních enginů se stejným seedem.
+    n = flat.size
+    if counter is not None:
+        burnt_out = burning[counter.uniform(step, BURNOUT, burning) < burnout_prob]
+    else:
+        burnt_out = burning[np.random.random(burning.size) < burnout_prob]
+
+    spread = neighbor_indices(burning, width, height, use_moore)
+    spread = spread[flat[spread] == TREE]
+    spontaneous = counter.candidates(step, IGNITE, f, 0, n) if counter is not None else sample_cells(n, f)
+    spontaneous = spontaneous[flat[spontaneous] == TREE]
+    ignited = np.union1d(spread, spontaneous)
+
+    grown = counter.candidates(step, GROW, p, 0, n) if counter is not None else sample_cells(n, p)
+    state = flat[grown]
+    grown_burnt = state == BURNT
+    grown = grown[(state == EMPTY) | grown_burnt]
+
+    if counts is not None:
+        burnt_count = np.count_nonzero(grown_burnt)
+        count_transitions(counts, grown.size - burnt_count, burnt_count, ignited.size, burnt_out.size)
+
+    flat[burnt_out] = BURNT
+    flat[ignited] = BURNING
+    flat[grown] = TREE
+    return np.union1d(np.setdiff1d(burning, burnt_out, assume_unique=True), ignited)
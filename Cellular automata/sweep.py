@@ -0,0 +1,95 @@
+import os
+import time
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ensemble import ForestFireEnsemble, FIRE_SIZE_BINS
+from frames import parse_size
+
+PARAMETERS = ["p", "f", "density", "burnout_prob"]
+
+
+def parameter_grid(values, replicas=1):
+    """Všechny kombinace hodnot parametrů, každá replicas krát - pole pro každý parametr a číslo repliky"""
+    rows = [combination + (replica,) for combination in itertools.product(*(values[name] for name in PARAMETERS))
+            for replica in range(replicas)]
+    columns = list(zip(*rows))
+    grid = {name: np.array(column, dtype=np.float64) for name, column in zip(PARAMETERS, columns)}
+    grid["replica"] = np.array(columns[-1], dtype=np.int32)
+    return grid
+
+
+def _run_batch(params, size, steps, burn_in, use_moore, seed, key):
+    # Jedna dávka běhů v jednom procesu. Náhodný generátor je určen (seed, index dávky),
+    # takže výsledek nezávisí na počtu procesů.
+    width, height = size
+    ensemble = ForestFireEnsemble(len(params["p"]), width, height, use_moore=use_moore,
+                                  seed=np.random.SeedSequence(seed, spawn_key=(key,)), **params)
+    return ensemble.run(steps, burn_in)
+
+
+def run_sweep(grid, size=(100, 100), steps=1000, burn_in=0, use_moore=False, batch_size=16, workers=1, seed=0):
+    """Spustí všechny běhy mřížky parametrů po dávkách a vrací pole souhrnných statistik"""
+    if burn_in >= steps:
+        raise ValueError(f"burn_in ({burn_in}) musí být menší než počet kroků ({steps})")
+    runs = len(grid["p"])
+    batches = [{name: grid[name][start:start + batch_size] for name in PARAMETERS}
+               for start in range(0, runs, batch_size)]
+    args = (size, steps, burn_in, use_moore, seed)
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results = list(executor.map(_run_batch, batches, *zip(*[args + (key,) for key in range(len(batches))])))
+    else:
+        results = [_run_batch(batch, *args, key) for key, batch in enumerate(batches)]
+
+    return {name: np.concatenate([result[name] for result in results]) for name in results[0]}
+
+
+def save_results(path, grid, results, **settings):
+    """Uloží parametry a statistiky všech běhů do komprimovaného souboru .npz"""
+    np.savez_compressed(
+        path,
+        **grid,
+        mean_tree_density=results["mean_tree_density"].astype(np.float32),
+        fire_sizes=results["fire_sizes"].astype(np.int32),
+        extinction_time=results["extinction_time"].astype(np.int32),
+        fire_size_bins=2 ** np.arange(FIRE_SIZE_BINS + 1),
+        **settings,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Průchod mřížkou parametrů modelu lesního požáru")
+    parser.add_argument("output", help="Výstupní soubor (.npz)")
+    parser.add_argument("--p", type=float, nargs="+", default=[0.05], help="Pravděpodobnosti růstu")
+    parser.add_argument("--f", type=float, nargs="+", default=[0.001], help="Pravděpodobnosti vznícení")
+    parser.add_argument("--density", type=float, nargs="+", default=[0.5], help="Počáteční hustoty stromů")
+    parser.add_argument("--burnout-prob", type=float, nargs="+", default=[0.8], help="Pravděpodobnosti vyhoření")
+    parser.add_argument("--replicas", type=int, default=1, help="Počet běhů pro každou kombinaci parametrů")
+    parser.add_argument("--size", type=parse_size, default=(100, 100), help="Rozměry lesa, např. 100x100")
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--burn-in", type=int, default=100, help="Počáteční kroky nezapočítané do průměrné hustoty")
+    parser.add_argument("--moore", action="store_true", help="Moorovo okolí")
+    parser.add_argument("--batch-size", type=int, default=16, help="Počet lesů simulovaných najednou v jednom procesu")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.burn_in >= args.steps:
+        parser.error("--burn-in musí být menší než --steps")
+
+    values = {"p": args.p, "f": args.f, "density": args.density, "burnout_prob": args.burnout_prob}
+    grid = parameter_grid(values, args.replicas)
+    start = time.perf_counter()
+    results = run_sweep(grid, args.size, args.steps, args.burn_in, args.moore, args.batch_size, args.workers,
+                        args.seed)
+    elapsed = time.perf_counter() - start
+    save_results(args.output, grid, results, size=args.size, steps=args.steps, burn_in=args.burn_in,
+                 use_moore=args.moore, seed=args.seed)
+    print(f"{len(grid['p'])} běhů za {elapsed:.1f} s, výsledky uloženy do {args.output}")
+
+
+if __name__ == "__main__":
+    main()
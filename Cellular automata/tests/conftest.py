@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Moduly simulace se importují jako skripty ze stejného adresáře
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
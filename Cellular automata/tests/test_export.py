@@ -0,0 +1,41 @@
+import os
+import numpy as np
+from PIL import Image
+from export import PngWriter, GifWriter, palette_image
+from frames import STATE_COLORS
+
+
+def make_frames(count=3, shape=(12, 16)):
+    rng = np.random.default_rng(1)
+    return [rng.integers(0, 4, shape, dtype=np.uint8) for _ in range(count)]
+
+
+def test_gif_writer_streams_all_frames(tmp_path):
+    path = str(tmp_path / "anim.gif")
+    grids = make_frames()
+    writer = GifWriter(path, fps=10)
+    for index, grid in enumerate(grids):
+        writer.write(index, palette_image(grid))
+    writer.close()
+
+    with Image.open(path) as gif:
+        assert gif.n_frames == len(grids)
+        assert gif.info["loop"] == 0
+        for index, grid in enumerate(grids):
+            gif.seek(index)
+            assert gif.info["duration"] == 100
+            assert np.array_equal(np.asarray(gif.convert("RGB")), STATE_COLORS[grid])
+
+
+def test_png_writer_numbers_frames(tmp_path):
+    directory = str(tmp_path / "frames")
+    grids = make_frames(2)
+    writer = PngWriter(directory)
+    for index, grid in enumerate(grids):
+        writer.write(index, palette_image(grid, size=(32, 24)))
+    writer.close()
+
+    assert sorted(os.listdir(directory)) == ["frame_00000.png", "frame_00001.png"]
+    with Image.open(os.path.join(directory, "frame_00001.png")) as frame:
+        assert frame.size == (32, 24)
+        assert np.array_equal(np.asarray(frame.convert("RGB"))[::2, ::2], STATE_COLORS[grids[1]])
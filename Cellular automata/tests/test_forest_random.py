@@ -0,0 +1,19 @@
+import numpy as np
+from forest_random import CounterRandom, IGNITE
+from main import ForestFire
+
+
+def test_tiny_probability_does_not_hang():
+    random = CounterRandom(7)
+    assert random.block_candidates(0, IGNITE, 1e-30, 0).size == 0
+    forest = ForestFire(50, 40, f=1e-30, seed=7)
+    forest.initialize_forest()
+    for _ in range(3):
+        forest.update()
+    assert forest.grid.shape == (40, 50)
+
+
+def test_candidates_match_mask_probability():
+    cells = CounterRandom(3).candidates(1, IGNITE, 0.01, 0, 200000)
+    assert np.all(np.diff(cells) > 0)
+    assert abs(cells.size - 2000) < 300
@@ -0,0 +1,31 @@
+import types
+import main
+
+
+class Stub:
+    def __init__(self):
+        self.state = None
+        self.text = None
+
+    def config(self, state):
+        self.state = state
+
+    def set(self, text):
+        self.text = text
+
+
+class FailingSimulator:
+    def save_animation(self, gif_filename):
+        raise OSError("disk je plný")
+
+
+def test_export_error_is_reported(monkeypatch, tmp_path):
+    shown = []
+    monkeypatch.setattr(main.messagebox, "showerror", lambda title, message: shown.append(message))
+    gui = types.SimpleNamespace(save_button=Stub(), stats_var=Stub(), export_error=None, root=None)
+    main.ForestFireSimulatorGUI.run_export(gui, FailingSimulator(), str(tmp_path / "out" / "anim.gif"))
+    gui.export_thread = types.SimpleNamespace(is_alive=lambda: False)
+    main.ForestFireSimulatorGUI.check_export(gui)
+    assert gui.save_button.state == main.tk.NORMAL
+    assert "disk je plný" in gui.stats_var.text
+    assert len(shown) == 1 and "disk je plný" in shown[0]
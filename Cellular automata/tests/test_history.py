@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from main import ForestFire
+from kernels import packed_width
+from history import HistoryRecorder, HistoryReader
+
+
+@pytest.mark.parametrize("keyframe_interval", [1, 10, 50])
+def test_history_round_trip_not_larger_than_raw(tmp_path, keyframe_interval):
+    # Hořící les - rozdíly proti klíčovému snímku jsou velké, záznam ale nesmí být větší než celé mřížky
+    path = str(tmp_path / "history.bin")
+    forest = ForestFire(100, 100, p=0.05, f=0.01, seed=1)
+    forest.initialize_forest(add_initial_fires=True)
+    recorder = HistoryRecorder(path, forest.width, forest.height, keyframe_interval)
+    grids = [forest.grid.copy()]
+    recorder.record(forest.cells, forest.packed)
+    for _ in range(60):
+        forest.update()
+        recorder.record(forest.cells, forest.packed)
+        grids.append(forest.grid.copy())
+    recorder.close()
+
+    reader = HistoryReader(path)
+    assert len(reader) == len(grids)
+    for step in np.random.default_rng(0).permutation(len(grids)):
+        assert np.array_equal(reader.grid(step), grids[step])
+    raw_size = len(grids) * forest.height * packed_width(forest.width)
+    assert reader.size() <= raw_size
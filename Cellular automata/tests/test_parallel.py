@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from main import ForestFire
+
+
+def test_parallel_matches_vectorized():
+    grids = []
+    for engine in ("vectorized", "parallel"):
+        forest = ForestFire(40, 30, engine=engine, seed=5, workers=2)
+        forest.initialize_forest(add_initial_fires=True)
+        for _ in range(10):
+            forest.update()
+        grids.append(forest.grid.copy())
+        forest.close()
+    assert np.array_equal(grids[0], grids[1])
+
+
+def test_killed_worker_raises_instead_of_hanging():
+    forest = ForestFire(40, 30, engine="parallel", seed=5, workers=2)
+    forest.update()
+    before = forest.grid.copy()
+    forest.stepper.processes[0].kill()
+    with pytest.raises(RuntimeError):
+        forest.update()
+    assert forest.stepper is None
+    assert np.array_equal(forest.grid, before)
@@ -0,0 +1,18 @@
+import pytest
+from ensemble import ForestFireEnsemble
+import sweep
+
+
+def test_burn_in_must_be_shorter_than_run():
+    with pytest.raises(ValueError):
+        ForestFireEnsemble(2, 20, 20, seed=0).run(100, burn_in=100)
+    grid = sweep.parameter_grid({"p": [0.05], "f": [0.001], "density": [0.5], "burnout_prob": [0.8]})
+    with pytest.raises(ValueError):
+        sweep.run_sweep(grid, (20, 20), steps=50, burn_in=100)
+    with pytest.raises(SystemExit):
+        sweep.main(["out.npz", "--steps", "50"])
+
+
+def test_mean_tree_density_uses_steps_after_burn_in():
+    results = ForestFireEnsemble(3, 30, 30, seed=0).run(20, burn_in=10)
+    assert ((results["mean_tree_density"] > 0) & (results["mean_tree_density"] <= 1)).all()
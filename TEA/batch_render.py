@@ -0,0 +1,213 @@
+import os
+import json
+import math
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, localcontext
+from PIL import Image, GifImagePlugin
+from fractal_computer import FractalComputer
+from colorizer import Colorizer, PALETTES, COLOR_MODES
+from render_cache import RenderCache
+from perturbation import precision_for_span
+
+# Výchozí pohledy, pokud klíčový snímek střed nebo měřítko neuvádí
+DEFAULT_VIEWS = {
+    "mandelbrot": (Decimal("-0.5"), Decimal("0"), 3.0),
+    "julia": (Decimal("0"), Decimal("0"), 3.0),
+}
+
+_computer = None
+
+
+def _init_worker():
+    # Každý proces má vlastní FractalComputer - snímky se počítají paralelně, ne dlaždice uvnitř snímku
+    global _computer
+    _computer = FractalComputer()
+    _computer.set_workers(1)
+    _computer.cache = RenderCache(max_bytes=0)
+
+
+def _render_frame(frame):
+    _computer.set_dimensions(*frame["size"])
+    _computer.set_deep_view(Decimal(frame["center"][0]), Decimal(frame["center"][1]), *frame["span"])
+    _computer.set_iterations(frame["iterations"])
+    _computer.set_julia_parameter(frame["julia_c"])
+    iterations = _computer.compute_fractal(frame["fractal"])
+    colorizer = Colorizer(frame["palette"], frame["mode"])
+    return colorizer.colorize(iterations, frame["iterations"], _computer.last_z)
+
+
+def load_path(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_keyframe(fractal_type, keyframe, previous=None):
+    # Chybějící hodnoty se převezmou z předchozího klíčového snímku (nebo výchozího pohledu)
+    if previous is None:
+        center_re, center_im, scale = DEFAULT_VIEWS[fractal_type]
+        previous = {"center": (center_re, center_im), "scale": scale, "iterations": 100,
+                    "c": complex(-0.7, 0.27)}
+    center = keyframe.get("center")
+    c = keyframe.get("c")
+    return {
+        "frame": int(keyframe["frame"]),
+        # Střed jako řetězec, aby se u hlubokého přiblížení neztratily číslice
+        "center": (Decimal(str(center[0])), Decimal(str(center[1]))) if center else previous["center"],
+        "scale": float(keyframe.get("scale", previous["scale"])),
+        "iterations": int(keyframe.get("iterations", previous["iterations"])),
+        "c": complex(c[0], c[1]) if c else previous["c"],
+    }
+
+
+def interpolate_path(fractal_type, keyframes):
+    # Měřítko se interpoluje geometricky (stálá rychlost přibližování), iterace a c lineárně.
+    # Střed se posouvá úměrně změně měřítka, takže cílový bod zůstává na stejném místě obrazu
+    # a nepřeletí se přes okolí, které je při malém měřítku úplně jinde.
+    parsed = []
+    for keyframe in sorted(keyframes, key=lambda k: k["frame"]):
+        parsed.append(parse_keyframe(fractal_type, keyframe, parsed[-1] if parsed else None))
+    if not parsed:
+        raise ValueError("Cesta neobsahuje žádný klíčový snímek")
+
+    for a, b in zip(parsed, parsed[1:]):
+        length = b["frame"] - a["frame"]
+        for n in range(a["frame"], b["frame"]):
+            t = (n - a["frame"]) / length
+            scale = math.exp(math.log(a["scale"]) * (1 - t) + math.log(b["scale"]) * t)
+            weight = t if a["scale"] == b["scale"] else (a["scale"] - scale) / (a["scale"] - b["scale"])
+            with localcontext() as context:
+                context.prec = precision_for_span(min(a["scale"], b["scale"]))
+                weight = Decimal(weight)
+                center = (a["center"][0] + (b["center"][0] - a["center"][0]) * weight,
+                          a["center"][1] + (b["center"][1] - a["center"][1]) * weight)
+            yield n, {
+                "center": center,
+                "scale": scale,
+                "iterations": round(a["iterations"] + (b["iterations"] - a["iterations"]) * t),
+                "c": a["c"] + (b["c"] - a["c"]) * t,
+            }
+    last = parsed[-1]
+    yield last["frame"], last
+
+
+def make_frames(description, size, palette, mode):
+    fractal_type = description.get("fractal", "mandelbrot")
+    if fractal_type not in DEFAULT_VIEWS:
+        raise ValueError(f"Nepodporovaný typ fraktálu: {fractal_type}")
+    width, height = size
+    for index, view in interpolate_path(fractal_type, description["keyframes"]):
+        yield index, {
+            "fractal": fractal_type,
+            "size": size,
+            "center": (str(view["center"][0]), str(view["center"][1])),
+            "span": (view["scale"], view["scale"] * height / width),
+            "iterations": view["iterations"],
+            "julia_c": view["c"],
+            "palette": palette,
+            "mode": mode,
+        }
+
+
+# Kopii PngWriter a GifWriter pro snímky s paletou má "Cellular automata/export.py",
+# oprava jedné kopie patří i do druhé
+
+class PngWriter:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, index, rgb):
+        Image.fromarray(rgb).save(os.path.join(self.directory, f"frame_{index:05d}.png"))
+
+    def close(self):
+        pass
+
+
+class GifWriter:
+    # Animovaný GIF zapisovaný průběžně snímek po snímku - Image.save(save_all=True) by držel
+    # všechny snímky v paměti až do konce
+    def __init__(self, path, fps):
+        self.file = open(path, "wb")
+        self.duration = round(1000 / fps)
+        self.started = False
+
+    def write(self, index, rgb):
+        frame = Image.fromarray(rgb).quantize(256)
+        if not self.started:
+            header, _ = GifImagePlugin.getheader(frame, info={"loop": 0})
+            self.file.writelines(header)
+            self.started = True
+        self.file.writelines(GifImagePlugin.getdata(frame, duration=self.duration, include_color_table=True))
+
+    def close(self):
+        self.file.write(b";")
+        self.file.close()
+
+
+def render_animation(description, output, size=(800, 800), workers=None, max_pending=None, palette="hsv",
+                     mode="classic", fps=25, log=print):
+    # Snímky se počítají paralelně v poolu procesů, ale v paměti je nanejvýš max_pending snímků -
+    # další se zadá až po zapsání nejstaršího, výstup je tak vždy ve správném pořadí
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    writer = GifWriter(output, fps) if output.lower().endswith(".gif") else PngWriter(output)
+    frames = make_frames(description, size, palette, mode)
+    context = multiprocessing.get_context("spawn")
+    pending = {}
+    written = 0
+    start_time = time.time()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as executor:
+            for index, frame in frames:
+                pending[index] = executor.submit(_render_frame, frame)
+                if len(pending) >= max_pending:
+                    write_oldest(writer, pending, written, start_time, log)
+                    written += 1
+            while pending:
+                write_oldest(writer, pending, written, start_time, log)
+                written += 1
+    finally:
+        for future in pending.values():
+            future.cancel()
+        writer.close()
+    elapsed = time.time() - start_time
+    log(f"Hotovo: {written} snímků za {elapsed:.2f} s ({written / elapsed:.2f} snímků/s)")
+    return written, elapsed
+
+
+def write_oldest(writer, pending, written, start_time, log):
+    index = min(pending)
+    rgb = pending.pop(index).result()
+    writer.write(index, rgb)
+    elapsed = time.time() - start_time
+    log(f"Snímek {index}: {written + 1} hotovo, {(written + 1) / elapsed:.2f} snímků/s")
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dávkové vykreslení animace fraktálu bez GUI")
+    parser.add_argument("path", help="JSON s cestou: {\"fractal\": ..., \"keyframes\": [{\"frame\", \"center\", "
+                                     "\"scale\", \"iterations\", \"c\"}, ...]}")
+    parser.add_argument("output", help="Soubor .gif, nebo adresář pro očíslované PNG")
+    parser.add_argument("--size", type=parse_size, default=(800, 800), help="Rozměry snímku, např. 640x480")
+    parser.add_argument("--workers", type=int, default=None, help="Počet procesů (výchozí počet jader)")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="Nejvýše rozpracovaných snímků v paměti (výchozí 2x počet procesů)")
+    parser.add_argument("--palette", choices=list(PALETTES), default="hsv")
+    parser.add_argument("--mode", choices=COLOR_MODES, default="classic")
+    parser.add_argument("--fps", type=float, default=25, help="Snímková frekvence GIF")
+    args = parser.parse_args(argv)
+
+    render_animation(load_path(args.path), args.output, args.size, args.workers, args.max_pending, args.palette,
+                     args.mode, args.fps)
+
+
+if __name__ == "__main__":
+    main()
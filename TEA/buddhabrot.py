@@ -0,0 +1,173 @@
+import os
+import math
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+from escape_time import mandelbrot_kernel, RenderCancelled
+from colorizer import Colorizer, PALETTES
+
+# Oblast, ze které se losují body c - obsahuje celou Mandelbrotovu množinu
+SAMPLE_BOUNDS = (-2.0, 1.0, -1.5, 1.5)
+# Počet bodů c v jedné dávce jednoho procesu
+BATCH_SIZE = 100000
+# Indexy navštívených pixelů se hromadí a do histogramu přičítají najednou (np.bincount)
+FLUSH_SIZE = 1 << 22
+
+
+def sample_points(rng, count):
+    x_min, x_max, y_min, y_max = SAMPLE_BOUNDS
+    return rng.uniform(x_min, x_max, count) + 1j * rng.uniform(y_min, y_max, count)
+
+
+def accumulate_orbits(c, steps, bounds, size, histogram, cancel=None):
+    # Iteruje z = z^2 + c od nuly, bod k přesně steps[k] kroků, a každou navštívenou hodnotu z
+    # uvnitř pohledu započítá do histogramu. Orbity se neukládají, paměť závisí jen na velikosti dávky.
+    x_min, x_max, y_min, y_max = bounds
+    width, height = size
+    scale_x = width / (x_max - x_min)
+    scale_y = height / (y_max - y_min)
+    z = np.zeros_like(c)
+    pending = []
+    pending_size = 0
+    flat = histogram.reshape(-1)
+
+    for i in range(int(steps.max(initial=0))):
+        if cancel is not None and cancel.is_set():
+            raise RenderCancelled()
+        z = z * z + c
+        fx = (z.real - x_min) * scale_x
+        fy = (z.imag - y_min) * scale_y
+        inside = (fx >= 0) & (fx < width) & (fy >= 0) & (fy < height)
+        index = fy[inside].astype(np.int64) * width + fx[inside].astype(np.int64)
+        pending.append(index)
+        pending_size += index.size
+        if pending_size >= FLUSH_SIZE:
+            flat += np.bincount(np.concatenate(pending), minlength=flat.size).astype(flat.dtype)
+            pending, pending_size = [], 0
+        live = steps > i + 1
+        if not live.all():
+            z, c, steps = z[live], c[live], steps[live]
+    if pending_size:
+        flat += np.bincount(np.concatenate(pending), minlength=flat.size).astype(flat.dtype)
+
+
+def orbit_steps(c, max_iterations, min_iterations=0, anti=False, cancel=None):
+    # První průchod: délka orbity každého bodu. Buddhabrot bere jen unikající orbity (aspoň
+    # min_iterations kroků), anti-Buddhabrot jen neunikající, ty se iterují max_iterations kroků.
+    iterations, final_z = mandelbrot_kernel(c, max_iterations, return_z=True, cancel=cancel)
+    escaped = final_z.real * final_z.real + final_z.imag * final_z.imag >= 4.0
+    if anti:
+        keep = ~escaped
+        return c[keep], np.full(np.count_nonzero(keep), max_iterations)
+    # Bod uniklý v kroku i navštívil i + 1 hodnot z (poslední už mimo kruh |z| < 2)
+    steps = iterations + 1
+    keep = escaped & (steps >= min_iterations)
+    return c[keep], steps[keep]
+
+
+def batch_counts(samples, batch_size, workers, round_index):
+    # Počty bodů dávek jednotlivých procesů v daném kole, dohromady přes všechna kola přesně samples
+    start = round_index * workers * batch_size
+    return [min(batch_size, max(0, samples - start - worker * batch_size)) for worker in range(workers)]
+
+
+def _render_batch(bounds, size, max_iterations, min_iterations, anti, batch_size, seed, key):
+    # Jedna dávka v jednom procesu s vlastním histogramem. Náhodný generátor je určen (seed, kolo, proces),
+    # takže navázaný běh dá stejný výsledek jako nepřerušený.
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=key))
+    width, height = size
+    histogram = np.zeros((height, width), dtype=np.int64)
+    c, steps = orbit_steps(sample_points(rng, batch_size), max_iterations, min_iterations, anti)
+    accumulate_orbits(c, steps, bounds, size, histogram)
+    return histogram
+
+
+def load_checkpoint(path, params):
+    if path is None or not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        # Chybějící klíč (starší formát, cizí soubor) je stejná neshoda jako jiná hodnota
+        saved = {name: data[name].tolist() if name in data else None for name in params}
+        if saved != params:
+            raise ValueError(f"Checkpoint {path} patří k jinému výpočtu: {saved}")
+        return data["histogram"].copy(), int(data["round"])
+
+
+def save_checkpoint(path, params, histogram, next_round):
+    # Zápis do dočasného souboru a přejmenování - přerušení při zápisu nepoškodí starý checkpoint
+    temporary = path + ".tmp.npz"
+    np.savez(temporary, histogram=histogram, round=next_round, **params)
+    os.replace(temporary, path)
+
+
+def render_buddhabrot(bounds, size, max_iterations, samples, min_iterations=0, anti=False, batch_size=BATCH_SIZE,
+                      workers=1, seed=0, checkpoint=None, cancel=None):
+    # Hustota orbit v pevném histogramu (height, width). Vzorky se zpracují po kolech, v každém kole
+    # spočítá každý proces jednu dávku do vlastního histogramu a ty se sečtou. Po každém kole se
+    # histogram uloží do checkpointu (.npz), odkud lze přerušený výpočet navázat.
+    # Zpracuje se přesně samples bodů, dávky v posledním kole jsou podle potřeby menší nebo prázdné.
+    width, height = size
+    params = {
+        "bounds": list(bounds), "size": [width, height], "max_iterations": max_iterations,
+        "min_iterations": min_iterations, "anti": anti, "samples": samples, "batch_size": batch_size,
+        "workers": workers, "seed": seed,
+    }
+    rounds = math.ceil(samples / (batch_size * workers))
+    histogram = np.zeros((height, width), dtype=np.int64)
+    first_round = 0
+    saved = load_checkpoint(checkpoint, params)
+    if saved is not None:
+        histogram, first_round = saved
+    args = (tuple(bounds), (width, height), max_iterations, min_iterations, anti)
+
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        for round_index in range(first_round, rounds):
+            if cancel is not None and cancel.is_set():
+                raise RenderCancelled()
+            counts = batch_counts(samples, batch_size, workers, round_index)
+            if executor is None:
+                histogram += _render_batch(*args, counts[0], seed, (round_index, 0))
+            else:
+                futures = [executor.submit(_render_batch, *args, count, seed, (round_index, worker))
+                           for worker, count in enumerate(counts) if count > 0]
+                for future in futures:
+                    histogram += future.result()
+            if checkpoint is not None:
+                save_checkpoint(checkpoint, params, histogram, round_index + 1)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return histogram
+
+
+def main(argv=None):
+    # Import až zde - batch_render importuje fractal_computer a ten zase tento modul
+    from batch_render import parse_size
+    parser = argparse.ArgumentParser(description="Buddhabrot / anti-Buddhabrot - hustota orbit Mandelbrotovy množiny")
+    parser.add_argument("output", help="Výstupní obrázek (PNG)")
+    parser.add_argument("--samples", type=int, default=10_000_000, help="Počet náhodných bodů c")
+    parser.add_argument("--size", type=parse_size, default=(800, 800), help="Rozměry obrazu, např. 800x800")
+    parser.add_argument("--bounds", type=float, nargs=4, default=list(SAMPLE_BOUNDS),
+                        metavar=("X_MIN", "X_MAX", "Y_MIN", "Y_MAX"))
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--min-iterations", type=int, default=0, help="Nejkratší započítaná unikající orbita")
+    parser.add_argument("--anti", action="store_true", help="Anti-Buddhabrot (neunikající orbity)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint", default=None, help="Soubor .npz pro uložení a navázání výpočtu")
+    parser.add_argument("--palette", choices=list(PALETTES), default="grayscale")
+    args = parser.parse_args(argv)
+
+    histogram = render_buddhabrot(args.bounds, args.size, args.iterations, args.samples, args.min_iterations,
+                                  args.anti, args.batch_size, args.workers, args.seed, args.checkpoint)
+    Image.fromarray(Colorizer(args.palette).colorize_density(histogram)).save(args.output)
+
+
+if __name__ == "__main__":
+    main()
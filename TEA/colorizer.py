@@ -0,0 +1,132 @@
+from functools import lru_cache
+import numpy as np
+from supersampling import blend_samples
+
+COLOR_MODES = ["classic", "smooth", "histogram"]
+
+
+def hsv_to_rgb(h, s, v):
+    # Vektorová obdoba colorsys.hsv_to_rgb se stejnými operacemi (stejné výsledky)
+    h, s, v = np.broadcast_arrays(np.asarray(h, dtype=float), np.asarray(s, dtype=float),
+                                  np.asarray(v, dtype=float))
+    i = (h * 6.0).astype(int)
+    f = h * 6.0 - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    i = i % 6
+    r = np.choose(i, [v, q, p, p, t, v])
+    g = np.choose(i, [t, v, v, q, p, p])
+    b = np.choose(i, [p, p, t, v, v, q])
+    r = np.where(s == 0.0, v, r)
+    g = np.where(s == 0.0, v, g)
+    b = np.where(s == 0.0, v, b)
+    return np.stack([r, g, b], axis=-1)
+
+
+def _hsv_palette(t, last):
+    value = np.where(last, 0.0, 1.0)
+    return hsv_to_rgb(t, 0.8, value)
+
+
+def _fire_palette(t, last):
+    rgb = np.stack([np.clip(3.0 * t, 0, 1), np.clip(3.0 * t - 1.0, 0, 1), np.clip(3.0 * t - 2.0, 0, 1)], axis=-1)
+    rgb[last] = 0.0
+    return rgb
+
+
+def _grayscale_palette(t, last):
+    rgb = np.repeat(t[:, None], 3, axis=1)
+    rgb[last] = 0.0
+    return rgb
+
+
+PALETTES = {
+    "hsv": _hsv_palette,
+    "fire": _fire_palette,
+    "grayscale": _grayscale_palette,
+}
+
+
+@lru_cache(maxsize=32)
+def palette_lut(palette, max_iterations):
+    # Tabulka barev pro počty iterací 0..max_iterations-1, poslední řádek (index max_iterations)
+    # je černá pro body, které neunikly
+    if palette not in PALETTES:
+        raise ValueError(f"Neznámá paleta: {palette}")
+    i = np.arange(max_iterations)
+    rgb = PALETTES[palette](i / max_iterations, i == max_iterations - 1)
+    lut = np.zeros((max_iterations + 1, 3), dtype=np.uint8)
+    lut[:max_iterations] = (rgb * 255).astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
+
+class Colorizer:
+    def __init__(self, palette="hsv", mode="classic"):
+        self.palette = palette
+        self.mode = mode
+
+    def set_palette(self, palette):
+        self.palette = palette
+
+    def set_mode(self, mode):
+        if mode not in COLOR_MODES:
+            raise ValueError(f"Neznámý režim barvení: {mode}")
+        self.mode = mode
+
+    def colorize(self, iterations, max_iterations, final_z=None, reference=None):
+        # reference: pole iterací, ze kterého se bere histogram (u podvzorků celý obraz)
+        lut = palette_lut(self.palette, max_iterations)
+        if self.mode == "smooth" and final_z is not None:
+            return self.interpolate(lut, self.smooth_index(iterations, final_z, max_iterations))
+        if self.mode == "histogram":
+            return self.interpolate(lut, self.histogram_index(iterations, max_iterations, reference))
+        return lut[np.minimum(iterations, max_iterations)]
+
+    def colorize_supersampled(self, iterations, max_iterations, final_z=None, samples=None):
+        # samples = (maska hranových pixelů, jejich podpixelové počty a z), viz supersampling.py
+        rgb = self.colorize(iterations, max_iterations, final_z)
+        if samples is None:
+            return rgb
+        mask, sub_iterations, sub_z = samples
+        colors = self.colorize(sub_iterations, max_iterations, sub_z, reference=iterations)
+        return blend_samples(rgb, mask, colors)
+
+    def colorize_density(self, histogram):
+        # Obraz hustoty (Buddhabrot): odmocnina z normované hustoty na 256 barev palety,
+        # odmocnina zvýrazní řídké orbity vedle několika velmi hustých pixelů
+        lut = palette_lut(self.palette, 257)
+        peak = histogram.max()
+        density = np.sqrt(histogram / peak) if peak > 0 else np.zeros(histogram.shape)
+        return lut[np.minimum((density * 256).astype(int), 255)]
+
+    def smooth_index(self, iterations, final_z, max_iterations):
+        # Spojitý počet iterací mu = n + 1 - log2(log|z| / log 2), pro uniklé body v intervalu (n, n+1]
+        norm = final_z.real * final_z.real + final_z.imag * final_z.imag
+        escaped = norm >= 4.0
+        index = iterations.astype(float)
+        log_z = 0.5 * np.log(norm[escaped])
+        index[escaped] += 1.0 - np.log2(log_z / np.log(2.0))
+        return np.clip(index, 0.0, max_iterations - 1)
+
+    def histogram_index(self, iterations, max_iterations, reference=None):
+        # Histogramová ekvalizace - barvy se rozloží podle kumulativního rozdělení počtů iterací,
+        # body s počtem 0 (vnitřek a okamžitý únik) do histogramu nevstupují a zůstanou na začátku palety
+        counts = np.minimum(iterations, max_iterations - 1).ravel()
+        if reference is None:
+            reference = iterations
+        histogram = np.bincount(np.minimum(reference, max_iterations - 1).ravel(), minlength=max_iterations)
+        histogram[0] = 0
+        cdf = np.cumsum(histogram, dtype=float)
+        if cdf[-1] > 0:
+            cdf /= cdf[-1]
+        return (cdf[counts] * (max_iterations - 1)).reshape(iterations.shape)
+
+    def interpolate(self, lut, index):
+        # Lineární interpolace mezi sousedními barvami tabulky
+        low = np.floor(index).astype(int)
+        high = np.minimum(low + 1, lut.shape[0] - 2)
+        frac = (index - low)[..., None]
+        rgb = lut[low] * (1.0 - frac) + lut[high] * frac
+        return rgb.astype(np.uint8)
@@ -0,0 +1,152 @@
+import numpy as np
+
+# Tolerance pro detekci periodické orbity
+PERIODICITY_TOLERANCE = 1e-12
+# Orbita se porovnává jen v každém n-tém kroku - cyklus periody p se pak najde
+# v kroku n*p, což je pořád násobek p, ale režie kontroly klesne n-krát
+PERIODICITY_STRIDE = 4
+
+
+class RenderCancelled(Exception):
+    pass
+
+
+def make_grid(x_min, x_max, y_min, y_max, width, height, rows=None, cols=None):
+    # Souřadnice se vždy počítají z celé mřížky, aby výřez (dlaždice) dal
+    # přesně stejné hodnoty jako výpočet celého obrazu najednou
+    re = np.linspace(x_min, x_max, width)
+    im = np.linspace(y_min, y_max, height)
+    if cols is not None:
+        re = re[cols]
+    if rows is not None:
+        im = im[rows]
+    X, Y = np.meshgrid(re, im)
+    return X + 1j * Y
+
+
+def interior_mask(C):
+    # Analytický test hlavní kardioidy a kruhu periody 2 - tyto body nikdy neuniknou
+    x = C.real
+    y2 = C.imag * C.imag
+    xq = x - 0.25
+    q = xq * xq + y2
+    in_cardioid = q * (q + xq) <= 0.25 * y2
+    in_bulb = (x + 1.0) * (x + 1.0) + y2 <= 0.0625
+    return in_cardioid | in_bulb
+
+
+def escape_time(Z, C, max_iterations, detect_periodicity=False, return_z=False, cancel=None):
+    # Iteruje jen body, které ještě neunikly. Aktivní body se drží ve zmenšujícím se
+    # poli indexů a hodnot, takže cena kroku odpovídá počtu živých pixelů, ne celé mřížce.
+    shape = np.shape(Z)
+    iterations = np.zeros(np.size(Z), dtype=int)
+    # complex64 vstup se počítá v complex64 (poloviční paměť), jinak complex128
+    z = np.array(Z, dtype=np.result_type(Z, np.complex64)).ravel()
+    c = np.array(C, dtype=z.dtype).ravel() if np.ndim(C) else complex(C)
+    idx = np.arange(z.size)
+    norm_buffer = np.empty(z.size, dtype=z.real.dtype)
+    imag_buffer = np.empty(z.size, dtype=z.real.dtype)
+    live_buffer = np.empty(z.size, dtype=bool)
+    if return_z:
+        # Konečná hodnota z každého bodu (u uniklých hodnota v okamžiku úniku)
+        final_z = z.copy()
+    if detect_periodicity:
+        # Brentova detekce cyklu: uložená hodnota se obnovuje v časech 4, 8, 16, ...
+        # a pokud se k ní orbita vrátí, bod leží uvnitř množiny (počet zůstává 0)
+        saved = z.copy()
+        next_save = PERIODICITY_STRIDE
+        periodic_buffer = np.empty(z.size, dtype=bool)
+
+    for i in range(max_iterations):
+        n = idx.size
+        if n == 0:
+            break
+        # Zrušení výpočtu (např. nové přiblížení v GUI) - cancel je threading.Event
+        if cancel is not None and cancel.is_set():
+            raise RenderCancelled()
+        norm = norm_buffer[:n]
+        imag_sq = imag_buffer[:n]
+        live = live_buffer[:n]
+
+        np.multiply(z, z, out=z)
+        np.add(z, c, out=z)
+        # |z|^2 < 4 místo np.abs(z) < 2, bez odmocniny
+        np.multiply(z.real, z.real, out=norm)
+        np.multiply(z.imag, z.imag, out=imag_sq)
+        np.add(norm, imag_sq, out=norm)
+        np.less(norm, 4.0, out=live)
+        keep = live
+
+        if detect_periodicity:
+            if i + 1 == next_save:
+                saved[:] = z
+                next_save *= 2
+            elif (i + 1) % PERIODICITY_STRIDE == 0:
+                # Nejdřív levný test reálné složky, imaginární jen u kandidátů
+                periodic = periodic_buffer[:n]
+                np.subtract(z.real, saved.real, out=norm)
+                np.abs(norm, out=norm)
+                np.less(norm, PERIODICITY_TOLERANCE, out=periodic)
+                if periodic.any():
+                    candidates = np.flatnonzero(periodic)
+                    periodic[candidates] = np.abs(z.imag[candidates] - saved.imag[candidates]) < PERIODICITY_TOLERANCE
+                    keep = live & ~periodic
+
+        if not keep.all():
+            iterations[idx[~live]] = i
+            if return_z:
+                final_z[idx[~keep]] = z[~keep]
+            idx = idx[keep]
+            z = z[keep]
+            if np.ndim(c):
+                c = c[keep]
+            if detect_periodicity:
+                saved = saved[keep]
+
+    if return_z:
+        final_z[idx] = z
+        return iterations.reshape(shape), final_z.reshape(shape)
+    return iterations.reshape(shape)
+
+
+def mandelbrot_kernel(C, max_iterations, skip_interior=True, return_z=False, cancel=None):
+    if not skip_interior:
+        return escape_time(np.zeros_like(C), C, max_iterations, return_z=return_z, cancel=cancel)
+    iterations = np.zeros(C.shape, dtype=int)
+    final_z = np.zeros(C.shape, dtype=C.dtype)
+    outside = ~interior_mask(C)
+    # z má stejný typ jako C - u pohledu v complex64 (hires_renderer) se nepřevádí na complex128
+    result = escape_time(np.zeros(np.count_nonzero(outside), dtype=C.dtype), C[outside],
+                         max_iterations, detect_periodicity=True, return_z=return_z, cancel=cancel)
+    if return_z:
+        iterations[outside], final_z[outside] = result
+        return iterations, final_z
+    iterations[outside] = result
+    return iterations
+
+
+def julia_kernel(Z, c, max_iterations, return_z=False, cancel=None):
+    return escape_time(Z, c, max_iterations, return_z=return_z, cancel=cancel)
+
+
+def julia_sweep_kernel(Z, cs, max_iterations, return_z=False, cancel=None):
+    # Juliovy množiny pro celý vektor konstant najednou - mřížka Z se zopakuje pro každé c
+    # a vše se iteruje jako jedno pole tvaru (len(cs), H, W)
+    cs = np.asarray(cs, dtype=complex)
+    shape = (cs.size,) + np.shape(Z)
+    Z = np.broadcast_to(Z, shape)
+    C = np.broadcast_to(cs.reshape((-1,) + (1,) * np.ndim(Z[0])), shape)
+    return escape_time(Z, C, max_iterations, return_z=return_z, cancel=cancel)
+
+
+def compute_region(fractal_type, bounds, size, julia_c, max_iterations, rows=None, cols=None, skip_interior=True,
+                   return_z=False, cancel=None):
+    x_min, x_max, y_min, y_max = bounds
+    width, height = size
+    grid = make_grid(x_min, x_max, y_min, y_max, width, height, rows, cols)
+    if fractal_type == "mandelbrot":
+        return mandelbrot_kernel(grid, max_iterations, skip_interior, return_z, cancel)
+    elif fractal_type == "julia":
+        return julia_kernel(grid, julia_c, max_iterations, return_z, cancel)
+    else:
+        raise ValueError(f"Nepodporovaný typ fraktálu: {fractal_type}")
@@ -1,5 +1,20 @@
 import numpy as np
-import colorsys
+from colorizer import palette_lut
+from escape_time import make_grid, mandelbrot_kernel, julia_kernel, julia_sweep_kernel, escape_time, interior_mask
+from tile_renderer import TileRenderer
+from render_cache import RenderCache
+from mariani_silver import mariani_silver
+from perturbation import render_deep
+from hires_renderer import render_to_memmap
+from buddhabrot import render_buddhabrot
+from supersampling import edge_mask, subpixel_samples, corner_samples, EDGE_THRESHOLD
+from decimal import Decimal
+
+# Paměť na jeden bod dávky Juliových množin: z a c (complex128), počty (int64), indexy, pracovní
+# buffery a kopie při zmenšování pole živých bodů. Změřená špička (tracemalloc) je 72-81 B bez
+# konečných z a 90-97 B s nimi podle toho, kolik bodů uniká brzy, konstanta je zaokrouhlená nahoru
+# s rezervou. Výstupní pole celého výpočtu (počty a z pro všechny konstanty) v tomto limitu nejsou.
+SWEEP_BYTES_PER_POINT = 104
 
 class FractalComputer:
     def __init__(self):
@@ -11,6 +26,25 @@ class FractalComputer:
         self.y_min = -1.5
         self.y_max = 1.5
         self.julia_c = complex(-0.7, 0.27)
+        self.skip_interior = True  # kardioida/kruh a detekce periodicity pro Mandelbrot
+        # Výchozí je sériový výpočet - pool procesů (spawn) potřebuje ve skriptu ochranu __main__
+        # a jeho start zdrží první vykreslení, GUI ho zapíná přes set_workers()
+        self.tile_renderer = TileRenderer(workers=1)
+        self.last_z = None  # konečné hodnoty z posledního výpočtu (pro spojité barvení)
+        self.cache = RenderCache()
+        self.last_cache_hit = False
+        self.state = None  # stav posledního výpočtu pro navázání při změně počtu iterací
+        self.reuse_viewport = False  # převzetí překrývajících se pixelů při posunu/přiblížení
+        self.last_reused_fraction = 0.0
+        self.cancel_event = None  # threading.Event pro zrušení rozpracovaného výpočtu
+        self.use_mariani_silver = False  # výpočet jen okrajů obdélníků a vyplnění stejnorodých
+        self.last_computed_fraction = 1.0
+        # Hluboké přiblížení: střed v Decimal a rozměry pohledu, pod prahem se použije perturbace
+        self.center = None
+        self.span = None
+        self.deep_zoom_threshold = 1e-10
+        self.last_supersampled_fraction = 0.0
+        self.last_truncated = False  # poslední výsledek vznikl oříznutím uloženého stavu na nižší limit
     
     def set_dimensions(self, width, height):
         self.width = width
@@ -21,6 +55,19 @@ class FractalComputer:
         self.x_max = x_max
         self.y_min = y_min
         self.y_max = y_max
+        self.center = None
+        self.span = None
+
+    def set_deep_view(self, center_re, center_im, span_x, span_y):
+        self.x_min = float(center_re) - span_x / 2
+        self.x_max = float(center_re) + span_x / 2
+        self.y_min = float(center_im) - span_y / 2
+        self.y_max = float(center_im) + span_y / 2
+        self.center = (Decimal(center_re), Decimal(center_im))
+        self.span = (span_x, span_y)
+
+    def is_deep(self):
+        return self.center is not None and min(self.span) < self.deep_zoom_threshold
     
     def set_iterations(self, max_iterations):
         self.max_iterations = max_iterations
@@ -28,56 +75,299 @@ class FractalComputer:
     def set_julia_parameter(self, c):
         self.julia_c = c
     
+    def set_workers(self, workers):
+        if workers != self.tile_renderer.workers:
+            self.tile_renderer.close()
+            self.tile_renderer = TileRenderer(workers=workers)
+
+    def get_bounds(self):
+        return (self.x_min, self.x_max, self.y_min, self.y_max)
+
+    def get_size(self):
+        return (self.width, self.height)
+
     def compute_mandelbrot(self):
-        re = np.linspace(self.x_min, self.x_max, self.width)
-        im = np.linspace(self.y_min, self.y_max, self.height)
-        X, Y = np.meshgrid(re, im)
-        C = X + 1j * Y
-
-        Z = np.zeros_like(C)
-        iterations = np.zeros(C.shape, dtype=int)
-        mask = np.ones(C.shape, dtype=bool)
-
-        for i in range(self.max_iterations):
-            Z[mask] = Z[mask]**2 + C[mask]
-            mask_new = np.abs(Z) < 2.0
-            iterations[mask & ~mask_new] = i
-            mask = mask_new
-        
+        C = make_grid(self.x_min, self.x_max, self.y_min, self.y_max, self.width, self.height)
+        iterations, self.last_z = mandelbrot_kernel(C, self.max_iterations, self.skip_interior, return_z=True,
+                                                  cancel=self.cancel_event)
         return iterations
     
     def compute_julia(self):
-        re = np.linspace(self.x_min, self.x_max, self.width)
-        im = np.linspace(self.y_min, self.y_max, self.height)
-        X, Y = np.meshgrid(re, im)
-        Z = X + 1j * Y
-
-        iterations = np.zeros(Z.shape, dtype=int)
-        mask = np.ones(Z.shape, dtype=bool)
-        
-        for i in range(self.max_iterations):
-            Z[mask] = Z[mask]**2 + self.julia_c
-            mask_new = np.abs(Z) < 2.0
-            iterations[mask & ~mask_new] = i
-            mask = mask_new
-        
+        Z = make_grid(self.x_min, self.x_max, self.y_min, self.y_max, self.width, self.height)
+        iterations, self.last_z = julia_kernel(Z, self.julia_c, self.max_iterations, return_z=True,
+                                             cancel=self.cancel_event)
+        return iterations
+
+    def compute_julia_sweep(self, cs, bounds=None, size=None, return_z=False, max_bytes=256 * 1024 * 1024):
+        # Juliovy množiny pro vektor konstant c jako pole (len(cs), H, W). Počítá se po dávkách
+        # tolika konstant, aby pracovní paměť jedné dávky nepřesáhla max_bytes.
+        cs = np.asarray(cs, dtype=complex).ravel()
+        width, height = size or self.get_size()
+        Z = make_grid(*(bounds or self.get_bounds()), width, height)
+        chunk = max(1, max_bytes // (Z.size * SWEEP_BYTES_PER_POINT))
+        iterations = np.zeros((cs.size, height, width), dtype=int)
+        final_z = np.zeros((cs.size, height, width), dtype=complex) if return_z else None
+        for start in range(0, cs.size, chunk):
+            # Výsledek dávky se hned zapíše, aby nezůstal v paměti během výpočtu další dávky
+            if return_z:
+                iterations[start:start + chunk], final_z[start:start + chunk] = julia_sweep_kernel(
+                    Z, cs[start:start + chunk], self.max_iterations, return_z, self.cancel_event)
+            else:
+                iterations[start:start + chunk] = julia_sweep_kernel(Z, cs[start:start + chunk], self.max_iterations,
+                                                                     return_z, self.cancel_event)
+        return (iterations, final_z) if return_z else iterations
+
+    def compute_julia_atlas(self, rows=32, cols=32, thumb_size=(32, 32), julia_bounds=(-1.5, 1.5, -1.5, 1.5),
+                            return_z=False):
+        # Mapa Juliových množin: náhled v buňce (i, j) patří konstantě c v pixelu (i, j) mřížky
+        # rows x cols přes aktuální pohled na Mandelbrotovu množinu. Vše jedním voláním compute_julia_sweep.
+        cs = make_grid(*self.get_bounds(), cols, rows)
+        result = self.compute_julia_sweep(cs, julia_bounds, thumb_size, return_z)
+        thumb_width, thumb_height = thumb_size
+
+        def tile(array):
+            array = array.reshape(rows, cols, thumb_height, thumb_width)
+            return array.transpose(0, 2, 1, 3).reshape(rows * thumb_height, cols * thumb_width)
+
+        if return_z:
+            return tile(result[0]), tile(result[1])
+        return tile(result)
+
+    def compute_hires(self, fractal_type, path, max_bytes=256 * 1024 * 1024):
+        # Plakátové rozlišení s pevným stropem paměti, výsledek je np.memmap v souboru path.
+        # Nejde přes cache ani stav pro navázání - tam se drží celé pole v paměti.
+        return render_to_memmap(fractal_type, self.get_bounds(), self.get_size(), self.julia_c,
+                                self.max_iterations, path, max_bytes, self.skip_interior,
+                                workers=self.tile_renderer.workers, cancel=self.cancel_event)
+
+    def compute_buddhabrot(self, samples, anti=False, min_iterations=0, checkpoint=None, seed=0):
+        # Hustota orbit (Buddhabrot / anti-Buddhabrot) v aktuálním pohledu jako histogram (H, W).
+        # Paměť nezávisí na počtu vzorků, s checkpointem lze dlouhý výpočet přerušit a navázat.
+        return render_buddhabrot(self.get_bounds(), self.get_size(), self.max_iterations, samples, min_iterations,
+                                 anti, workers=self.tile_renderer.workers, seed=seed, checkpoint=checkpoint,
+                                 cancel=self.cancel_event)
+
+    def compute_tiled(self, fractal_type):
+        iterations, self.last_z = self.tile_renderer.render(fractal_type, self.get_bounds(), self.get_size(),
+                                                            self.julia_c, self.max_iterations,
+                                                            skip_interior=self.skip_interior, return_z=True,
+                                                            cancel=self.cancel_event)
         return iterations
     
-    def create_color_palette(self):
-        colors = []
-        for i in range(self.max_iterations):
-            hue = i / self.max_iterations
-            saturation = 0.8
-            value = 1.0 if i < self.max_iterations - 1 else 0.0
-            r, g, b = colorsys.hsv_to_rgb(hue, saturation, value)
-            colors.append((int(r * 255), int(g * 255), int(b * 255)))
-        
-        return colors
+    def create_color_palette(self, palette="hsv"):
+        # Paleta se bere z cachované tabulky, viz colorizer.palette_lut
+        return [tuple(color) for color in palette_lut(palette, self.max_iterations)[:self.max_iterations].tolist()]
     
+    def get_method(self):
+        if self.is_deep():
+            return "perturbation"
+        return "mariani_silver" if self.use_mariani_silver else "escape_time"
+
+    def get_view_bounds(self):
+        # Hranice ve float64 hluboký pohled nepopíšou, klíčem je pak přesný střed a rozměry
+        if self.is_deep():
+            return (str(self.center[0]), str(self.center[1])) + self.span
+        return self.get_bounds()
+
+    def cache_key(self, fractal_type):
+        return RenderCache.make_key(fractal_type, self.julia_c, self.get_view_bounds(), self.max_iterations,
+                                    self.get_size(), self.get_method())
+
+    def is_cached(self, fractal_type):
+        return self.cache_key(fractal_type) in self.cache.entries
+
+    def view_key(self, fractal_type):
+        return RenderCache.make_key(fractal_type, self.julia_c, self.get_view_bounds(), None, self.get_size(),
+                                    self.get_method())
+
     def compute_fractal(self, fractal_type):
-        if fractal_type == "mandelbrot":
-            return self.compute_mandelbrot()
+        # Stejný pohled (zpět, reset, přepnutí fraktálu) se vezme z cache bez přepočtu
+        key = self.cache_key(fractal_type)
+        self.last_reused_fraction = 0.0
+        self.last_computed_fraction = 1.0
+        cached = self.cache.get(key)
+        self.last_cache_hit = cached is not None
+        if cached is not None:
+            iterations, self.last_z = cached
+            view = self.view_key(fractal_type)
+            stale = self.state is None or self.state["view"] != view or self.state["max_iterations"] < self.max_iterations
+            if stale and self.get_method() == "escape_time":
+                self.save_state(view, fractal_type, iterations)
+            return iterations
+        self.last_truncated = False
+        iterations = self.compute_uncached(fractal_type)
+        # Oříznutý výsledek má u oříznutých bodů z = 0, z cache by se pak nedalo správně navázat
+        if not self.last_truncated:
+            self.cache.put(key, (iterations, self.last_z))
+        return iterations
+
+    def compute_uncached(self, fractal_type):
+        if self.is_deep():
+            return self.compute_perturbation(fractal_type)
+        # Pro stejný pohled s jiným počtem iterací se navazuje na uložený stav
+        view = self.view_key(fractal_type)
+        if self.state is not None and self.state["view"] == view:
+            if self.max_iterations <= self.state["max_iterations"]:
+                return self.truncate_state()
+            return self.resume_state(fractal_type)
+        if self.use_mariani_silver:
+            return self.compute_mariani_silver(fractal_type)
+        if self.reuse_viewport and self.state is not None:
+            iterations = self.reuse_state(fractal_type)
+            if iterations is not None:
+                return iterations
+
+        # Na více jádrech se obraz rozdělí na dlaždice a počítá paralelně
+        if self.tile_renderer.workers > 1 and fractal_type in ("mandelbrot", "julia"):
+            iterations = self.compute_tiled(fractal_type)
+        elif fractal_type == "mandelbrot":
+            iterations = self.compute_mandelbrot()
         elif fractal_type == "julia":
-            return self.compute_julia()
+            iterations = self.compute_julia()
         else:
-            raise ValueError(f"Nepodporovaný typ fraktálu: {fractal_type}")
\ No newline at end of file
+            raise ValueError(f"Nepodporovaný typ fraktálu: {fractal_type}")
+        self.save_state(view, fractal_type, iterations)
+        return iterations
+
+    def compute_supersamples(self, fractal_type, iterations, threshold=EDGE_THRESHOLD, samples=None):
+        # Adaptivní antialiasing po compute_fractal: podpixelově se přepočítají jen pixely na hranách
+        # (velký rozdíl počtu iterací proti sousedům). Výsledek pro Colorizer.colorize_supersampled.
+        # Bez samples se použije střed pixelu a sdílené rohy, se samples mřížka samples x samples.
+        self.last_supersampled_fraction = 0.0
+        if self.is_deep():
+            return None
+        mask = edge_mask(iterations, threshold)
+        if samples is None:
+            sub_iterations, sub_z = corner_samples(fractal_type, self.get_bounds(), self.get_size(), self.julia_c,
+                                                   self.max_iterations, mask, iterations, self.last_z,
+                                                   self.skip_interior, self.cancel_event)
+        else:
+            sub_iterations, sub_z = subpixel_samples(fractal_type, self.get_bounds(), self.get_size(),
+                                                     self.julia_c, self.max_iterations, mask, samples,
+                                                     self.skip_interior, self.cancel_event)
+        self.last_supersampled_fraction = np.count_nonzero(mask) / mask.size
+        return mask, sub_iterations, sub_z
+
+    def compute_perturbation(self, fractal_type):
+        iterations, self.last_z = render_deep(fractal_type, *self.center, *self.span, self.get_size(), self.julia_c,
+                                              self.max_iterations, self.cancel_event)
+        self.state = None
+        return iterations
+
+    def compute_mariani_silver(self, fractal_type):
+        # Vyplněné body nemají skutečnou konečnou hodnotu z, takže se z nich nedá navázat
+        iterations, self.last_z, self.last_computed_fraction = mariani_silver(
+            fractal_type, self.get_bounds(), self.get_size(), self.julia_c, self.max_iterations,
+            self.skip_interior, self.cancel_event)
+        self.state = None
+        return iterations
+
+    def save_state(self, view, fractal_type, iterations, live=None):
+        if live is None:
+            # Živé jsou body, které neunikly a nejsou v kardioidě/kruhu (ty by neunikly nikdy)
+            norm = self.last_z.real ** 2 + self.last_z.imag ** 2
+            live = norm < 4.0
+            if fractal_type == "mandelbrot" and self.skip_interior:
+                live &= ~interior_mask(make_grid(*self.get_bounds(), self.width, self.height))
+        self.state = {
+            "view": view,
+            "max_iterations": self.max_iterations,
+            "iterations": iterations,
+            "final_z": self.last_z,
+            "live": live,
+        }
+
+    def align_axis(self, old_min, old_max, new_min, new_max, count):
+        # Vrací (nové indexy, staré indexy) vzorků, které leží na staré mřížce, jinak None.
+        # Nová mřížka musí mít krok old_step / k pro celé k a posun o celý počet nových kroků.
+        if count < 2:
+            return None
+        old_step = (old_max - old_min) / (count - 1)
+        new_step = (new_max - new_min) / (count - 1)
+        scale = old_step / new_step
+        k = round(scale)
+        offset = (new_min - old_min) / new_step
+        if k < 1 or abs(scale - k) > 1e-6 * k or abs(offset - round(offset)) > 1e-3:
+            return None
+        positions = np.arange(count) + round(offset)
+        valid = (positions % k == 0) & (positions >= 0) & (positions < count * k)
+        return np.flatnonzero(valid), positions[valid] // k
+
+    def reuse_state(self, fractal_type):
+        # Pohled je posunutý nebo celočíselně přiblížený vůči poslednímu výpočtu - překrývající se
+        # vzorky se zkopírují a spočítají se jen nově odkryté pruhy nebo proložené vzorky
+        old_view = self.state["view"]
+        view = self.view_key(fractal_type)
+        if (old_view[0], old_view[1], old_view[4]) != (view[0], view[1], view[4]):
+            return None
+        if self.state["max_iterations"] != self.max_iterations:
+            return None
+        old_x_min, old_x_max, old_y_min, old_y_max = old_view[2]
+        cols = self.align_axis(old_x_min, old_x_max, self.x_min, self.x_max, self.width)
+        rows = self.align_axis(old_y_min, old_y_max, self.y_min, self.y_max, self.height)
+        if cols is None or rows is None:
+            return None
+
+        known = np.zeros((self.height, self.width), dtype=bool)
+        known[np.ix_(rows[0], cols[0])] = True
+        missing = ~known
+        missing_fraction = np.count_nonzero(missing) / missing.size
+        # Pokud by se stejně počítala většina obrazu, je rychlejší paralelní výpočet celého pohledu
+        if missing_fraction * self.tile_renderer.workers >= 1.0 and self.tile_renderer.workers > 1:
+            return None
+
+        iterations = np.zeros((self.height, self.width), dtype=int)
+        self.last_z = np.zeros((self.height, self.width), dtype=complex)
+        old_rows, old_cols = np.ix_(rows[1], cols[1])
+        new_rows, new_cols = np.ix_(rows[0], cols[0])
+        iterations[new_rows, new_cols] = self.state["iterations"][old_rows, old_cols]
+        self.last_z[new_rows, new_cols] = self.state["final_z"][old_rows, old_cols]
+
+        grid = make_grid(*self.get_bounds(), self.width, self.height)[missing]
+        if fractal_type == "mandelbrot":
+            iterations[missing], self.last_z[missing] = mandelbrot_kernel(grid, self.max_iterations,
+                                                                           self.skip_interior, return_z=True,
+                                                                           cancel=self.cancel_event)
+        else:
+            iterations[missing], self.last_z[missing] = julia_kernel(grid, self.julia_c, self.max_iterations,
+                                                                     return_z=True, cancel=self.cancel_event)
+        self.last_reused_fraction = 1.0 - missing_fraction
+        self.save_state(view, fractal_type, iterations)
+        return iterations
+
+    def truncate_state(self):
+        # Nižší limit: body, které unikly až po novém limitu, se berou jako neuniklé
+        iterations = self.state["iterations"].copy()
+        self.last_z = self.state["final_z"].copy()
+        over = iterations >= self.max_iterations
+        iterations[over] = 0
+        self.last_z[over] = 0
+        self.last_truncated = True
+        return iterations
+
+    def resume_state(self, fractal_type):
+        # Vyšší limit: pokračuje se jen u živých bodů od uložených hodnot z
+        previous = self.state["max_iterations"]
+        live = self.state["live"]
+        idx = np.flatnonzero(live)
+        Z = self.state["final_z"].ravel()[idx]
+        if fractal_type == "mandelbrot":
+            C = make_grid(*self.get_bounds(), self.width, self.height).ravel()[idx]
+        else:
+            C = self.julia_c
+        sub_iterations, sub_z = escape_time(Z, C, self.max_iterations - previous,
+                                            detect_periodicity=fractal_type == "mandelbrot" and self.skip_interior,
+                                            return_z=True, cancel=self.cancel_event)
+        escaped = sub_z.real ** 2 + sub_z.imag ** 2 >= 4.0
+
+        iterations = self.state["iterations"].copy()
+        iterations.ravel()[idx[escaped]] = previous + sub_iterations[escaped]
+        self.last_z = self.state["final_z"].copy()
+        self.last_z.ravel()[idx] = sub_z
+        live = live.copy()
+        live.ravel()[idx[escaped]] = False
+        self.save_state(self.state["view"], fractal_type, iterations, live)
+        return iterations
+
+    def close(self):
+        self.tile_renderer.close()
@@ -1,8 +1,18 @@
+import os
 import tkinter as tk
 from tkinter import ttk
 from PIL import Image, ImageTk
 import time
+import queue
+import threading
+from decimal import Decimal, localcontext
 from fractal_computer import FractalComputer
+from colorizer import Colorizer, PALETTES, COLOR_MODES
+from escape_time import compute_region, RenderCancelled
+from perturbation import render_deep, precision_for_span
+
+# Náhledy v nižším rozlišení (1/8, 1/4, 1/2) před výpočtem v plném rozlišení
+PREVIEW_SCALES = [8, 4, 2]
 
 class FractalViewer(tk.Tk):
     def __init__(self):
@@ -10,8 +20,7 @@ class FractalViewer(tk.Tk):
         self.title("Fractal Viewer")
         self.geometry("820x1000")
         self.width, self.height = 800, 800
-        self.x_min, self.x_max = -2.0, 1.0
-        self.y_min, self.y_max = -1.5, 1.5
+        self.set_bounds(-2.0, 1.0, -1.5, 1.5)
         self.max_iterations = 100
         self.current_fractal = "mandelbrot"  # výchozí fraktál
         self.julia_c = complex(-0.7, 0.27)  # výchozí hodnota pro Julia set
@@ -20,11 +29,30 @@ class FractalViewer(tk.Tk):
         self.fractal_computer.set_bounds(self.x_min, self.x_max, self.y_min, self.y_max)
         self.fractal_computer.set_iterations(self.max_iterations)
         self.fractal_computer.set_julia_parameter(self.julia_c)
+        self.fractal_computer.set_workers(os.cpu_count() or 1)
         self.fractal_types = ["mandelbrot", "julia"]
+        self.colorizer = Colorizer()
+        # Výpočet běží v pracovním vlákně, výsledky se předávají frontou do hlavního vlákna Tk
+        self.compute_lock = threading.Lock()
+        self.render_queue = queue.Queue()
+        self.render_job_id = 0
+        self.cancel_event = None
+        self.canvas_image = None
+        self.shown = None
         self.zoom_history = []
         self.save_current_view()
         self.setup_ui()
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.poll_id = self.after(15, self.poll_render_queue)
         self.render_image()
+
+    def on_closing(self):
+        self.after_cancel(self.poll_id)
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+        with self.compute_lock:
+            self.fractal_computer.close()
+        self.destroy()
     
     def setup_ui(self):
         control_frame = ttk.Frame(self)
@@ -47,6 +75,28 @@ class FractalViewer(tk.Tk):
         iter_entry.bind("<Return>", lambda e: self.change_iterations(iter_var.get()))
         
         
+        ttk.Label(control_frame, text="Colors:").pack(side=tk.LEFT, padx=5)
+        palette_var = tk.StringVar(value=self.colorizer.palette)
+        palette_dropdown = ttk.Combobox(control_frame, textvariable=palette_var,
+                                       values=list(PALETTES), width=9, state="readonly")
+        palette_dropdown.pack(side=tk.LEFT, padx=5)
+        palette_dropdown.bind("<<ComboboxSelected>>", self.change_palette)
+
+        mode_var = tk.StringVar(value=self.colorizer.mode)
+        mode_dropdown = ttk.Combobox(control_frame, textvariable=mode_var,
+                                    values=COLOR_MODES, width=9, state="readonly")
+        mode_dropdown.pack(side=tk.LEFT, padx=5)
+        mode_dropdown.bind("<<ComboboxSelected>>", self.change_color_mode)
+
+        self.reuse_var = tk.BooleanVar(value=self.fractal_computer.reuse_viewport)
+        ttk.Checkbutton(control_frame, text="Reuse", variable=self.reuse_var).pack(side=tk.LEFT, padx=5)
+        self.mariani_var = tk.BooleanVar(value=self.fractal_computer.use_mariani_silver)
+        ttk.Checkbutton(control_frame, text="M-S", variable=self.mariani_var,
+                        command=self.render_image).pack(side=tk.LEFT, padx=5)
+        self.antialias_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="AA", variable=self.antialias_var,
+                        command=self.render_image).pack(side=tk.LEFT, padx=5)
+
         ttk.Button(control_frame, text="Reset", command=self.reset_view).pack(side=tk.LEFT, padx=5)
         ttk.Button(control_frame, text="Back", command=self.go_back).pack(side=tk.LEFT, padx=5)
         
@@ -80,11 +130,17 @@ class FractalViewer(tk.Tk):
         self.canvas.bind("<ButtonPress-1>", self.start_zoom)
         self.canvas.bind("<B1-Motion>", self.update_zoom_box)
         self.canvas.bind("<ButtonRelease-1>", self.end_zoom)
+        # Posun šipkami o 1/10 obrazu
+        self.canvas.bind("<Left>", lambda e: self.pan(-self.width // 10, 0))
+        self.canvas.bind("<Right>", lambda e: self.pan(self.width // 10, 0))
+        self.canvas.bind("<Up>", lambda e: self.pan(0, -self.height // 10))
+        self.canvas.bind("<Down>", lambda e: self.pan(0, self.height // 10))
         
         self.zoom_start = None
         self.zoom_rect = None
     
     def start_zoom(self, event):
+        self.canvas.focus_set()
         self.zoom_start = (event.x, event.y)
         if self.zoom_rect:
             self.canvas.delete(self.zoom_rect)
@@ -110,14 +166,11 @@ class FractalViewer(tk.Tk):
 
             self.save_current_view()
 
-            x_min_new = self.x_min + (self.x_max - self.x_min) * min(x1, x2) / self.width
-            x_max_new = self.x_min + (self.x_max - self.x_min) * max(x1, x2) / self.width
-            y_min_new = self.y_min + (self.y_max - self.y_min) * min(y1, y2) / self.height
-            y_max_new = self.y_min + (self.y_max - self.y_min) * max(y1, y2) / self.height
-
-            self.x_min, self.x_max = x_min_new, x_max_new
-            self.y_min, self.y_max = y_min_new, y_max_new
-            self.fractal_computer.set_bounds(self.x_min, self.x_max, self.y_min, self.y_max)
+            if self.reuse_var.get():
+                self.zoom_to_fractions(*self.aligned_zoom_fractions(x1, y1, x2, y2))
+            else:
+                self.zoom_to_fractions(min(x1, x2) / self.width, max(x1, x2) / self.width,
+                                       min(y1, y2) / self.height, max(y1, y2) / self.height)
 
             if self.zoom_rect:
                 self.canvas.delete(self.zoom_rect)
@@ -126,12 +179,49 @@ class FractalViewer(tk.Tk):
             
             self.render_image()
     
+    def aligned_zoom_fractions(self, x1, y1, x2, y2):
+        # Výběr se zarovná na celočíselné přiblížení od pixelu starého obrazu, aby nová
+        # mřížka ležela na staré a překrývající se vzorky šlo převzít
+        scale = max(1, round(min(self.width / abs(x2 - x1), self.height / abs(y2 - y1))))
+        fx = min(x1, x2) / (self.width - 1)
+        fy = min(y1, y2) / (self.height - 1)
+        return fx, fx + 1 / scale, fy, fy + 1 / scale
+
+    def pan(self, dx_pixels, dy_pixels):
+        self.save_current_view()
+        fx = dx_pixels / (self.width - 1)
+        fy = dy_pixels / (self.height - 1)
+        self.zoom_to_fractions(fx, 1 + fx, fy, 1 + fy)
+        self.render_image()
+
+    def set_view(self, center_re, center_im, span_x, span_y):
+        # Přesný střed se drží v Decimal, aby šlo přibližovat i pod rozlišení float64
+        self.center = (center_re, center_im)
+        self.span = (span_x, span_y)
+        self.x_min = float(center_re) - span_x / 2
+        self.x_max = float(center_re) + span_x / 2
+        self.y_min = float(center_im) - span_y / 2
+        self.y_max = float(center_im) + span_y / 2
+
+    def set_bounds(self, x_min, x_max, y_min, y_max):
+        self.set_view((Decimal(x_min) + Decimal(x_max)) / 2, (Decimal(y_min) + Decimal(y_max)) / 2,
+                      x_max - x_min, y_max - y_min)
+
+    def zoom_to_fractions(self, fx0, fx1, fy0, fy1):
+        # Nový pohled jako výřez starého daný podíly šířky a výšky (0 = levý/horní okraj, 1 = pravý/dolní)
+        span_x, span_y = self.span
+        with localcontext() as context:
+            context.prec = precision_for_span(min(span_x, span_y))
+            left = self.center[0] - Decimal(span_x) / 2
+            top = self.center[1] - Decimal(span_y) / 2
+            center_re = left + Decimal(span_x) * Decimal((fx0 + fx1) / 2)
+            center_im = top + Decimal(span_y) * Decimal((fy0 + fy1) / 2)
+        self.set_view(center_re, center_im, span_x * (fx1 - fx0), span_y * (fy1 - fy0))
+
     def save_current_view(self):
         view = {
-            'x_min': self.x_min,
-            'x_max': self.x_max,
-            'y_min': self.y_min,
-            'y_max': self.y_max,
+            'center': self.center,
+            'span': self.span,
             'fractal': self.current_fractal,
             'julia_c': self.julia_c,
             'iterations': self.max_iterations
@@ -144,16 +234,10 @@ class FractalViewer(tk.Tk):
         if len(self.zoom_history) > 1:
             self.zoom_history.pop()
             prev = self.zoom_history[-1]
-            self.x_min = prev['x_min']
-            self.x_max = prev['x_max']
-            self.y_min = prev['y_min']
-            self.y_max = prev['y_max']
+            self.set_view(*prev['center'], *prev['span'])
             self.current_fractal = prev['fractal']
             self.julia_c = prev['julia_c']
             self.max_iterations = prev['iterations']
-            self.fractal_computer.set_bounds(self.x_min, self.x_max, self.y_min, self.y_max)
-            self.fractal_computer.set_iterations(self.max_iterations)
-            self.fractal_computer.set_julia_parameter(self.julia_c)
 
             self.update_ui_from_state()
             self.render_image()
@@ -169,13 +253,10 @@ class FractalViewer(tk.Tk):
     def reset_view(self):
         self.save_current_view()
         if self.current_fractal == "mandelbrot":
-            self.x_min, self.x_max = -2.0, 1.0
-            self.y_min, self.y_max = -1.5, 1.5
+            self.set_bounds(-2.0, 1.0, -1.5, 1.5)
         elif self.current_fractal == "julia":
-            self.x_min, self.x_max = -1.5, 1.5
-            self.y_min, self.y_max = -1.5, 1.5
+            self.set_bounds(-1.5, 1.5, -1.5, 1.5)
         
-        self.fractal_computer.set_bounds(self.x_min, self.x_max, self.y_min, self.y_max)
         self.render_image()
     
     def change_fractal(self, event):
@@ -197,7 +278,6 @@ class FractalViewer(tk.Tk):
             if iterations != self.max_iterations and iterations > 0:
                 self.save_current_view()
                 self.max_iterations = iterations
-                self.fractal_computer.set_iterations(self.max_iterations)
                 self.render_image()
         except ValueError:
             pass
@@ -210,30 +290,147 @@ class FractalViewer(tk.Tk):
             if new_c != self.julia_c:
                 self.save_current_view()
                 self.julia_c = new_c
-                self.fractal_computer.set_julia_parameter(self.julia_c)
                 self.render_image()
         except ValueError:
             pass
     
+    def change_palette(self, event):
+        self.colorizer.set_palette(event.widget.get())
+        if self.shown is not None:
+            self.display_fractal(*self.shown)
+
+    def change_color_mode(self, event):
+        self.colorizer.set_mode(event.widget.get())
+        if self.shown is not None:
+            self.display_fractal(*self.shown)
+
     def render_image(self):
-        start_time = time.time()
+        # Předchozí výpočet se zruší a spustí se nový v pracovním vlákně
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+        self.cancel_event = threading.Event()
+        self.render_job_id += 1
+        job = {
+            'id': self.render_job_id,
+            'fractal': self.current_fractal,
+            'bounds': (self.x_min, self.x_max, self.y_min, self.y_max),
+            'center': self.center,
+            'span': self.span,
+            'julia_c': self.julia_c,
+            'iterations': self.max_iterations,
+            'reuse': self.reuse_var.get(),
+            'mariani_silver': self.mariani_var.get(),
+            'antialias': self.antialias_var.get(),
+            'start_time': time.time(),
+        }
         self.status_var.set("Calculating...")
-        self.update()
-        iterations = self.fractal_computer.compute_fractal(self.current_fractal)
-        colors = self.fractal_computer.create_color_palette()
-        img = Image.new('RGB', (self.width, self.height), color='black')
-        pixels = img.load()
-        for x in range(self.width):
-            for y in range(self.height):
-                iter_count = iterations[y, x]
-                pixels[x, y] = colors[iter_count] if iter_count < self.max_iterations else (0, 0, 0)
-        
+        threading.Thread(target=self.render_worker, args=(job, self.cancel_event), daemon=True).start()
+
+    def render_worker(self, job, cancel):
+        try:
+            with self.compute_lock:
+                self.apply_job(job)
+                cached = self.fractal_computer.is_cached(job['fractal'])
+                deep = self.fractal_computer.is_deep()
+            if not cached:
+                for scale in PREVIEW_SCALES:
+                    size = (max(1, self.width // scale), max(1, self.height // scale))
+                    if deep:
+                        iterations, final_z = render_deep(job['fractal'], *job['center'], *job['span'], size,
+                                                          job['julia_c'], job['iterations'], cancel)
+                    else:
+                        iterations, final_z = compute_region(job['fractal'], job['bounds'], size, job['julia_c'],
+                                                             job['iterations'], return_z=True, cancel=cancel)
+                    self.render_queue.put((job, scale, iterations, final_z, None))
+            with self.compute_lock:
+                if cancel.is_set():
+                    return
+                self.apply_job(job)
+                self.fractal_computer.cancel_event = cancel
+                iterations = self.fractal_computer.compute_fractal(job['fractal'])
+                samples = None
+                if job['antialias']:
+                    samples = self.fractal_computer.compute_supersamples(job['fractal'], iterations)
+                info = {
+                    'cache_hit': self.fractal_computer.last_cache_hit,
+                    'cache_views': len(self.fractal_computer.cache),
+                    'cache_bytes': self.fractal_computer.cache.nbytes,
+                    'reused': self.fractal_computer.last_reused_fraction,
+                    'computed': self.fractal_computer.last_computed_fraction,
+                    'samples': samples,
+                    'supersampled': self.fractal_computer.last_supersampled_fraction if samples else 0.0,
+                }
+                self.render_queue.put((job, 1, iterations, self.fractal_computer.last_z, info))
+        except RenderCancelled:
+            pass
+        except Exception as error:
+            # Jinak by vlákno skončilo potichu a stavový řádek by zůstal na "Calculating..."
+            self.render_queue.put((job, error))
+
+    def apply_job(self, job):
+        # Parametry se do FractalComputer nastavují jen z pracovního vlákna (pod zámkem)
+        self.fractal_computer.set_deep_view(*job['center'], *job['span'])
+        self.fractal_computer.set_iterations(job['iterations'])
+        self.fractal_computer.set_julia_parameter(job['julia_c'])
+        self.fractal_computer.reuse_viewport = job['reuse']
+        self.fractal_computer.use_mariani_silver = job['mariani_silver']
+
+    def poll_render_queue(self):
+        try:
+            while True:
+                result = self.render_queue.get_nowait()
+                if result[0]['id'] != self.render_job_id:
+                    continue
+                if len(result) == 2:
+                    self.show_render_error(*result)
+                else:
+                    self.display_fractal(*result)
+        except queue.Empty:
+            pass
+        self.poll_id = self.after(15, self.poll_render_queue)
+
+    def show_render_error(self, job, error):
+        elapsed = time.time() - job['start_time']
+        self.status_var.set(f"{job['fractal'].capitalize()} | Render failed after {elapsed:.2f}s: "
+                            f"{type(error).__name__}: {error}")
+
+    def display_fractal(self, job, scale, iterations, final_z, info):
+        # Obarvení se dá zopakovat bez nového výpočtu (změna palety nebo režimu barvení)
+        self.shown = (job, scale, iterations, final_z, info)
+        samples = info['samples'] if info is not None else None
+        rgb = self.colorizer.colorize_supersampled(iterations, job['iterations'], final_z, samples)
+        img = Image.fromarray(rgb, 'RGB')
+        if scale > 1:
+            img = img.resize((self.width, self.height), Image.NEAREST)
+
         self.photo = ImageTk.PhotoImage(image=img)
-        self.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
-        elapsed = time.time() - start_time
-        fractal_name = self.current_fractal.capitalize()
-        if self.current_fractal == "julia":
-            fractal_name += f" (c={self.julia_c})"
-        bounds = f"X: [{self.x_min:.6f}, {self.x_max:.6f}], Y: [{self.y_min:.6f}, {self.y_max:.6f}]"
-        status = f"{fractal_name} | {bounds} | Iterations: {self.max_iterations} | Render time: {elapsed:.2f}s"
-        self.status_var.set(status)
\ No newline at end of file
+        if self.canvas_image is None:
+            self.canvas_image = self.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
+        else:
+            self.canvas.itemconfig(self.canvas_image, image=self.photo)
+        if self.zoom_rect:
+            self.canvas.tag_raise(self.zoom_rect)
+        elapsed = time.time() - job['start_time']
+        fractal_name = job['fractal'].capitalize()
+        if job['fractal'] == "julia":
+            fractal_name += f" (c={job['julia_c']})"
+        x_min, x_max, y_min, y_max = job['bounds']
+        if min(job['span']) < 1e-6:
+            bounds = f"Center: {job['center'][0]:.20g} {job['center'][1]:+.20g}i, Span: {job['span'][0]:.3e}"
+        else:
+            bounds = f"X: [{x_min:.6f}, {x_max:.6f}], Y: [{y_min:.6f}, {y_max:.6f}]"
+        if info is None:
+            status = f"{fractal_name} | {bounds} | Preview 1/{scale} | {elapsed:.2f}s | Calculating..."
+            self.status_var.set(status)
+            return
+        cache_state = "hit" if info['cache_hit'] else "miss"
+        cache_info = f"Cache: {cache_state} ({info['cache_views']} views, {info['cache_bytes'] / 2**20:.1f} MB)"
+        if info['reused'] > 0:
+            cache_info += f" | Reused: {info['reused']:.0%}"
+        if info['computed'] < 1.0:
+            cache_info += f" | Computed: {info['computed']:.0%}"
+        if info['supersampled'] > 0:
+            cache_info += f" | AA: {info['supersampled']:.0%}"
+        status = (f"{fractal_name} | {bounds} | Iterations: {job['iterations']} | "
+                  f"Render time: {elapsed:.2f}s | {cache_info}")
+        self.status_var.set(status)
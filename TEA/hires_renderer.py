@@ -0,0 +1,90 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from escape_time import mandelbrot_kernel, julia_kernel, RenderCancelled
+
+# Odhad paměti na jeden pixel rozpracovaného pruhu (souřadnice, z, počty, pracovní buffery a masky)
+BYTES_PER_POINT = 96
+# complex64 stačí, dokud je krok mřížky aspoň tolikrát větší než velikost souřadnic
+# (float32 má relativní přesnost ~1.2e-7, tedy zhruba 80 ulp na pixel)
+COMPLEX64_MIN_STEP = 1e-5
+
+
+def complex_dtype_for_view(bounds, size):
+    x_min, x_max, y_min, y_max = bounds
+    width, height = size
+    step = min((x_max - x_min) / max(width - 1, 1), (y_max - y_min) / max(height - 1, 1))
+    magnitude = max(abs(x_min), abs(x_max), abs(y_min), abs(y_max), 1.0)
+    return np.complex64 if step >= magnitude * COMPLEX64_MIN_STEP else np.complex128
+
+
+def count_dtype(max_iterations):
+    return np.uint16 if max_iterations <= np.iinfo(np.uint16).max else np.uint32
+
+
+def make_rows(x_min, x_max, y_min, y_max, width, height, y0, y1, dtype=np.complex128):
+    # Souřadnice jen pro řádky y0:y1 bez meshgrid - řádek reálných a sloupec imaginárních
+    # částí se sečtou broadcastem. Hodnoty jsou stejné jako v make_grid pro celý obraz.
+    real_dtype = np.finfo(dtype).dtype
+    re = np.linspace(x_min, x_max, width).astype(real_dtype)
+    im = np.linspace(y_min, y_max, height)[y0:y1].astype(real_dtype)
+    grid = np.empty((y1 - y0, width), dtype=dtype)
+    grid.real = re[None, :]
+    grid.imag = im[:, None]
+    return grid
+
+
+def _render_band(path, shape, dtype, fractal_type, bounds, julia_c, max_iterations, skip_interior, complex_dtype,
+                 y0, y1, chunk_rows, cancel=None):
+    # Pruh řádků y0:y1 se počítá po chuncích chunk_rows řádků a zapisuje přímo do souboru
+    out = np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+    height, width = shape
+    try:
+        for start in range(y0, y1, chunk_rows):
+            stop = min(start + chunk_rows, y1)
+            if cancel is not None and cancel.is_set():
+                raise RenderCancelled()
+            grid = make_rows(*bounds, width, height, start, stop, complex_dtype)
+            if fractal_type == "mandelbrot":
+                iterations = mandelbrot_kernel(grid, max_iterations, skip_interior, cancel=cancel)
+            elif fractal_type == "julia":
+                iterations = julia_kernel(grid, julia_c, max_iterations, cancel=cancel)
+            else:
+                raise ValueError(f"Nepodporovaný typ fraktálu: {fractal_type}")
+            out[start:stop] = iterations
+        out.flush()
+    finally:
+        del out
+    return y0
+
+
+def render_to_memmap(fractal_type, bounds, size, julia_c, max_iterations, path, max_bytes=256 * 1024 * 1024,
+                     skip_interior=True, complex_dtype=None, workers=1, cancel=None):
+    # Obraz libovolné velikosti s pevným stropem pracovní paměti: výsledek (uint16/uint32 počty)
+    # jde rovnou do np.memmap souboru, v paměti je vždy jen několik pruhů řádků.
+    width, height = size
+    dtype = count_dtype(max_iterations)
+    if complex_dtype is None:
+        complex_dtype = complex_dtype_for_view(bounds, size)
+    out = np.memmap(path, dtype=dtype, mode="w+", shape=(height, width))
+    del out
+    # Rozpočet se dělí mezi procesy, každý drží v paměti jen jeden chunk
+    chunk_rows = max(1, max_bytes // (workers * width * BYTES_PER_POINT))
+    args = ((height, width), dtype, fractal_type, bounds, julia_c, max_iterations, skip_interior, complex_dtype)
+
+    if workers <= 1:
+        _render_band(path, *args, 0, height, chunk_rows, cancel)
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [executor.submit(_render_band, path, *args, y0, min(y0 + chunk_rows, height), chunk_rows)
+                       for y0 in range(0, height, chunk_rows)]
+            try:
+                for future in futures:
+                    future.result()
+                    if cancel is not None and cancel.is_set():
+                        raise RenderCancelled()
+            finally:
+                for future in futures:
+                    future.cancel()
+    return np.memmap(path, dtype=dtype, mode="r", shape=(height, width))
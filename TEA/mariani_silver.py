@@ -0,0 +1,86 @@
+import numpy as np
+from escape_time import mandelbrot_kernel, julia_kernel
+
+# Obdélníky menší než tato velikost se už nedělí a spočítají se celé
+MIN_RECT_SIZE = 16
+
+
+def _compute_points(fractal_type, re, im, rows, cols, julia_c, max_iterations, skip_interior, cancel):
+    grid = re[cols] + 1j * im[rows]
+    if fractal_type == "mandelbrot":
+        return mandelbrot_kernel(grid, max_iterations, skip_interior, return_z=True, cancel=cancel)
+    elif fractal_type == "julia":
+        return julia_kernel(grid, julia_c, max_iterations, return_z=True, cancel=cancel)
+    else:
+        raise ValueError(f"Nepodporovaný typ fraktálu: {fractal_type}")
+
+
+def _border(y0, y1, x0, x1):
+    # Indexy pixelů na okraji obdélníku (hranice včetně)
+    xs = np.arange(x0, x1 + 1)
+    ys = np.arange(y0 + 1, y1)
+    rows = np.concatenate([np.full(xs.size, y0), np.full(xs.size, y1), ys, ys])
+    cols = np.concatenate([xs, xs, np.full(ys.size, x0), np.full(ys.size, x1)])
+    return rows, cols
+
+
+def mariani_silver(fractal_type, bounds, size, julia_c, max_iterations, skip_interior=True, cancel=None):
+    # Mandelbrotova množina (i souvislá Juliova množina) je souvislá, takže obdélník, jehož celý okraj
+    # má stejný počet iterací, má stejný počet i uvnitř a nemusí se počítat. Okraje všech obdélníků
+    # jedné úrovně se spočítají najednou, nestejnorodé obdélníky se rozdělí na čtvrtiny.
+    x_min, x_max, y_min, y_max = bounds
+    width, height = size
+    re = np.linspace(x_min, x_max, width)
+    im = np.linspace(y_min, y_max, height)
+    iterations = np.zeros((height, width), dtype=int)
+    final_z = np.zeros((height, width), dtype=complex)
+    escaped = np.zeros((height, width), dtype=bool)
+    computed = np.zeros((height, width), dtype=bool)
+
+    def compute(rows, cols):
+        todo = ~computed[rows, cols]
+        rows, cols = rows[todo], cols[todo]
+        if rows.size == 0:
+            return
+        # Sdílené okraje sousedních obdélníků se počítají jen jednou
+        flat = np.unique(rows * width + cols)
+        rows, cols = flat // width, flat % width
+        counts, z = _compute_points(fractal_type, re, im, rows, cols, julia_c, max_iterations, skip_interior, cancel)
+        iterations[rows, cols] = counts
+        final_z[rows, cols] = z
+        escaped[rows, cols] = z.real * z.real + z.imag * z.imag >= 4.0
+        computed[rows, cols] = True
+
+    rects = [(0, height - 1, 0, width - 1)]
+    while rects:
+        borders = [_border(*rect) for rect in rects]
+        compute(np.concatenate([b[0] for b in borders]), np.concatenate([b[1] for b in borders]))
+
+        next_rects = []
+        small_rows, small_cols = [], []
+        for (y0, y1, x0, x1), (rows, cols) in zip(rects, borders):
+            if y1 - y0 < 2 or x1 - x0 < 2:
+                continue
+            values = iterations[rows, cols]
+            flags = escaped[rows, cols]
+            # Obdélník obsahující počátek by mohl obepínat celou množinu, ten se nevyplňuje
+            contains_origin = re[x0] < 0.0 < re[x1] and im[y0] < 0.0 < im[y1]
+            if (values == values[0]).all() and (flags == flags[0]).all() and not contains_origin:
+                iterations[y0 + 1:y1, x0 + 1:x1] = values[0]
+                escaped[y0 + 1:y1, x0 + 1:x1] = flags[0]
+                continue
+            if y1 - y0 <= MIN_RECT_SIZE or x1 - x0 <= MIN_RECT_SIZE:
+                inner_rows, inner_cols = np.mgrid[y0 + 1:y1, x0 + 1:x1]
+                small_rows.append(inner_rows.ravel())
+                small_cols.append(inner_cols.ravel())
+                continue
+            ym = (y0 + y1) // 2
+            xm = (x0 + x1) // 2
+            next_rects += [(y0, ym, x0, xm), (y0, ym, xm, x1), (ym, y1, x0, xm), (ym, y1, xm, x1)]
+
+        if small_rows:
+            compute(np.concatenate(small_rows), np.concatenate(small_cols))
+        rects = next_rects
+
+    computed_fraction = np.count_nonzero(computed) / computed.size
+    return iterations, final_z, computed_fraction
@@ -0,0 +1,128 @@
+import math
+from decimal import Decimal, localcontext
+import numpy as np
+from escape_time import RenderCancelled
+
+# Aproximace řadou se používá, dokud je kubický člen menší než tento podíl lineárního
+SERIES_TOLERANCE = 1e-12
+# Kolik platných číslic navíc oproti měřítku pohledu se drží u referenční orbity
+EXTRA_DIGITS = 20
+
+
+def precision_for_span(span):
+    return max(30, int(-math.log10(span)) + EXTRA_DIGITS) if span > 0 else 30
+
+
+def reference_orbit(z0_re, z0_im, c_re, c_im, max_iterations, precision):
+    # Referenční orbita v libovolné přesnosti (decimal), uložená jako float64 - stačí,
+    # protože pixely se počítají jen jako malé odchylky od ní
+    with localcontext() as context:
+        context.prec = precision
+        x, y = Decimal(z0_re), Decimal(z0_im)
+        cx, cy = Decimal(c_re), Decimal(c_im)
+        orbit = [complex(float(x), float(y))]
+        for _ in range(max_iterations):
+            x, y = x * x - y * y + cx, 2 * x * y + cy
+            fx, fy = float(x), float(y)
+            orbit.append(complex(fx, fy))
+            if fx * fx + fy * fy >= 4.0:
+                break
+    return np.array(orbit)
+
+
+def series_coefficients(orbit, max_delta):
+    # Koeficienty d_n ~ A_n dc + B_n dc^2 + C_n dc^3, vrací nejvyšší n, kde je řada ještě přesná
+    A = B = C = 0j
+    coefficients = [(A, B, C)]
+    for n in range(len(orbit) - 1):
+        Z = orbit[n]
+        A, B, C = 2 * Z * A + 1, 2 * Z * B + A * A, 2 * Z * C + 2 * A * B
+        if not (np.isfinite(A) and np.isfinite(B) and np.isfinite(C)):
+            break
+        if abs(C) * max_delta * max_delta > SERIES_TOLERANCE * abs(A):
+            break
+        coefficients.append((A, B, C))
+    return coefficients
+
+
+def perturbation_kernel(orbit, d0, dc, max_iterations, start=0, cancel=None):
+    # d_{n+1} = 2 Z_m d_n + d_n^2 + dc, kde Z_m je referenční orbita. Když je |z| menší než |d|
+    # (hrozí ztráta přesnosti - glitch) nebo dojde referenční orbita, bod se přebázuje:
+    # d = z - Z_0 a index do reference m začne znovu od nuly.
+    shape = np.shape(d0)
+    iterations = np.zeros(np.size(d0), dtype=int)
+    final_z = np.zeros(np.size(d0), dtype=complex)
+    d = np.array(d0, dtype=complex).ravel()
+    dc = np.broadcast_to(np.asarray(dc, dtype=complex), shape).ravel().copy()
+    idx = np.arange(d.size)
+    last = len(orbit) - 1
+    # Dokud se žádný bod nepřebázoval, mají všechny body stejný index m a Z_m je skalár
+    m = start
+    Zm = orbit[m]
+    uniform = True
+
+    for i in range(start, max_iterations):
+        if idx.size == 0:
+            break
+        if cancel is not None and cancel.is_set():
+            raise RenderCancelled()
+        # (2 Z_m + d) d + dc
+        t = 2.0 * Zm + d
+        d *= t
+        d += dc
+        m += 1
+        Zm = orbit[m]
+        z = Zm + d
+        norm = z.real * z.real + z.imag * z.imag
+        escaped = norm >= 4.0
+        if escaped.any():
+            iterations[idx[escaped]] = i
+            final_z[idx[escaped]] = z[escaped]
+            live = ~escaped
+            idx, d, dc, z, norm = idx[live], d[live], dc[live], z[live], norm[live]
+            if not uniform:
+                m, Zm = m[live], Zm[live]
+        rebase = (norm < d.real * d.real + d.imag * d.imag) | (m == last)
+        if rebase.any():
+            if uniform:
+                m = np.full(d.size, m)
+                Zm = np.full(d.size, Zm)
+                uniform = False
+            d[rebase] = z[rebase] - orbit[0]
+            m[rebase] = 0
+            Zm[rebase] = orbit[0]
+
+    final_z[idx] = Zm + d
+    return iterations.reshape(shape), final_z.reshape(shape)
+
+
+def render_deep(fractal_type, center_re, center_im, span_x, span_y, size, julia_c, max_iterations, cancel=None):
+    # Hluboké přiblížení: střed v Decimal, rozměry pohledu jako float. Souřadnice pixelů se
+    # počítají jen jako float odchylky od středu, takže nezáleží na absolutní hloubce.
+    width, height = size
+    offsets_re = np.linspace(-span_x / 2, span_x / 2, width)
+    offsets_im = np.linspace(-span_y / 2, span_y / 2, height)
+    delta = offsets_re[None, :] + 1j * offsets_im[:, None]
+    precision = precision_for_span(min(span_x, span_y))
+
+    if fractal_type == "mandelbrot":
+        orbit = reference_orbit(0, 0, center_re, center_im, max_iterations, precision)
+        max_delta = float(np.abs(delta).max())
+        coefficients = series_coefficients(orbit, max_delta)
+        start = len(coefficients) - 1
+        # Přeskočení prvních iterací řadou; pokud by některý pixel unikl dřív, řada se zkrátí
+        while start > 0:
+            A, B, C = coefficients[start]
+            d0 = A * delta + B * delta * delta + C * delta * delta * delta
+            z = orbit[start] + d0
+            if (z.real * z.real + z.imag * z.imag < 4.0).all():
+                break
+            start //= 2
+        if start == 0:
+            d0 = np.zeros_like(delta)
+        return perturbation_kernel(orbit, d0, delta, max_iterations, start, cancel)
+    elif fractal_type == "julia":
+        orbit = reference_orbit(center_re, center_im, julia_c.real, julia_c.imag, max_iterations, precision)
+        return perturbation_kernel(orbit, delta, 0j, max_iterations, 0, cancel)
+    else:
+        raise ValueError(f"Nepodporovaný typ fraktálu: {fractal_type}")
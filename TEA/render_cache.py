@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+
+class RenderCache:
+    # LRU cache vypočítaných polí s omezenou pamětí, nejstarší položky se zahazují jako první
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(fractal_type, julia_c, bounds, max_iterations, size, method="escape_time"):
+        # Pro Mandelbrotovu množinu parametr c výsledek neovlivňuje
+        if fractal_type != "julia":
+            julia_c = None
+        return (fractal_type, julia_c, tuple(bounds), max_iterations, tuple(size), method)
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, arrays):
+        size = sum(array.nbytes for array in arrays)
+        if size > self.max_bytes:
+            return
+        if key in self.entries:
+            self.nbytes -= sum(array.nbytes for array in self.entries.pop(key))
+        for array in arrays:
+            array.flags.writeable = False
+        self.entries[key] = arrays
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= sum(array.nbytes for array in evicted)
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self.entries)
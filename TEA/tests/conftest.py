@@ -0,0 +1,24 @@
+import os
+import sys
+import pytest
+
+# Moduly TEA se importují jako skripty ze stejného adresáře
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def record_calls(monkeypatch):
+    # record_calls(modul, "jméno") nahradí funkci modulu obalem, který volá původní funkci
+    # a ukládá argumenty každého volání; vrací seznam dvojic (args, kwargs)
+    def record(module, name):
+        calls = []
+        original = getattr(module, name)
+
+        def recording(*args, **kwargs):
+            calls.append((args, kwargs))
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(module, name, recording)
+        return calls
+
+    return record
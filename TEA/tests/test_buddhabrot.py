@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+import buddhabrot
+from buddhabrot import batch_counts, render_buddhabrot
+
+
+def test_batch_counts_sum_to_samples():
+    counts = [batch_counts(1050, 100, 4, round_index) for round_index in range(3)]
+    assert counts == [[100, 100, 100, 100], [100, 100, 100, 100], [100, 100, 50, 0]]
+
+
+def test_render_uses_exactly_requested_samples(record_calls, tmp_path):
+    calls = record_calls(buddhabrot, "sample_points")
+    checkpoint = str(tmp_path / "buddha.npz")
+    render_buddhabrot((-2.0, 1.0, -1.5, 1.5), (32, 32), 50, 250, batch_size=100, checkpoint=checkpoint)
+    assert [args[1] for args, kwargs in calls] == [100, 100, 50]
+
+
+def test_checkpoint_without_current_parameter_is_mismatch(tmp_path):
+    checkpoint = str(tmp_path / "old.npz")
+    np.savez(checkpoint, histogram=np.zeros((32, 32), dtype=np.int64), round=1, seed=0)
+    with pytest.raises(ValueError):
+        render_buddhabrot((-2.0, 1.0, -1.5, 1.5), (32, 32), 50, 250, batch_size=100, checkpoint=checkpoint)
@@ -0,0 +1,14 @@
+import numpy as np
+import escape_time
+from escape_time import mandelbrot_kernel
+from hires_renderer import make_rows
+
+
+def test_mandelbrot_skip_interior_keeps_complex64(record_calls):
+    # Pohled vybraný v complex64 se při přeskakování kardioidy nesmí převést na complex128
+    calls = record_calls(escape_time, "escape_time")
+    C = make_rows(-2.0, 1.0, -1.5, 1.5, 64, 64, 0, 64, dtype=np.complex64)
+    iterations, final_z = mandelbrot_kernel(C, 100, skip_interior=True, return_z=True)
+
+    assert [np.asarray(args[0]).dtype for args, kwargs in calls] == [np.complex64]
+    assert final_z.dtype == np.complex64
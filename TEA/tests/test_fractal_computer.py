@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from fractal_computer import FractalComputer
+
+
+def make_computer(bounds, max_iterations):
+    computer = FractalComputer()
+    computer.set_dimensions(120, 120)
+    computer.set_bounds(*bounds)
+    computer.max_iterations = max_iterations
+    return computer
+
+
+@pytest.mark.parametrize("fractal_type, bounds", [
+    ("mandelbrot", (-2.0, 1.0, -1.5, 1.5)),
+    ("julia", (-1.5, 1.5, -1.5, 1.5)),
+])
+def test_resume_after_truncated_cache_hit(fractal_type, bounds):
+    # Snížení limitu, posun tam a zpět (cache) a zvýšení limitu musí dát stejný výsledek jako nový výpočet
+    computer = make_computer(bounds, 200)
+    computer.compute_fractal(fractal_type)
+    computer.max_iterations = 100
+    computer.compute_fractal(fractal_type)
+    x_min, x_max, y_min, y_max = bounds
+    computer.set_bounds(x_min + 0.3, x_max + 0.3, y_min, y_max)
+    computer.compute_fractal(fractal_type)
+    computer.set_bounds(*bounds)
+    computer.compute_fractal(fractal_type)
+    computer.max_iterations = 300
+    iterations = computer.compute_fractal(fractal_type)
+
+    expected = make_computer(bounds, 300).compute_fractal(fractal_type)
+    assert np.array_equal(iterations, expected)
+
+
+def test_default_render_is_serial():
+    # Bez set_workers se nespouští pool procesů (skript nemusí mít ochranu __main__)
+    computer = FractalComputer()
+    computer.set_dimensions(64, 64)
+    computer.compute_fractal("mandelbrot")
+    assert computer.tile_renderer.workers == 1
+    assert computer.tile_renderer.executor is None
+
+
+def test_julia_sweep_chunk_stays_within_memory_limit():
+    import tracemalloc
+    from fractal_computer import SWEEP_BYTES_PER_POINT
+    computer = FractalComputer()
+    size = (100, 100)
+    cs = np.linspace(-0.8, -0.6, 7) + 0.27j
+    max_bytes = 3 * size[0] * size[1] * SWEEP_BYTES_PER_POINT
+    # Výřez s velkým vnitřkem - body unikají pozdě, kopie při zmenšování pole jsou největší
+    tracemalloc.start()
+    computer.compute_julia_sweep(cs, bounds=(-0.3, 0.3, -0.3, 0.3), size=size, return_z=True, max_bytes=max_bytes)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # Výstupní pole celé dávky a mřížka Z do limitu nepatří
+    output = cs.size * size[0] * size[1] * (8 + 16) + size[0] * size[1] * 16
+    assert peak - output <= max_bytes
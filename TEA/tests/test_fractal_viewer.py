@@ -0,0 +1,27 @@
+import queue
+import threading
+import time
+import types
+from fractal_viewer import FractalViewer
+
+
+class FailingComputer:
+    def is_cached(self, fractal_type):
+        raise MemoryError("not enough memory")
+
+
+class StatusVar:
+    def set(self, text):
+        self.text = text
+
+
+def test_render_error_reaches_status_bar():
+    job = {'id': 1, 'fractal': "mandelbrot", 'start_time': time.time()}
+    viewer = types.SimpleNamespace(compute_lock=threading.Lock(), apply_job=lambda job: None,
+                                   fractal_computer=FailingComputer(), render_queue=queue.Queue(),
+                                   status_var=StatusVar())
+    FractalViewer.render_worker(viewer, job, threading.Event())
+    result = viewer.render_queue.get_nowait()
+    assert result[0] is job and isinstance(result[1], MemoryError)
+    FractalViewer.show_render_error(viewer, *result)
+    assert "MemoryError: not enough memory" in viewer.status_var.text
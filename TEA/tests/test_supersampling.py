@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+import supersampling
+from escape_time import compute_region
+from supersampling import edge_mask, corner_samples, sample_points
+
+
+@pytest.mark.parametrize("fractal_type", ["mandelbrot", "julia"])
+def test_corner_samples_share_corners(record_calls, fractal_type):
+    bounds, size, julia_c = (-2.0, 1.0, -1.5, 1.5), (90, 90), complex(-0.7, 0.27)
+    iterations, final_z = compute_region(fractal_type, bounds, size, julia_c, 100, return_z=True)
+    mask = edge_mask(iterations)
+    calls = record_calls(supersampling, "sample_points")
+    sub_iterations, sub_z = corner_samples(fractal_type, bounds, size, julia_c, 100, mask, iterations, final_z)
+
+    # Jediné volání jádra a sdílené rohy: méně než 2 nové body na hranový pixel místo 4
+    assert len(calls) == 1 and calls[0][0][1].size < 2 * np.count_nonzero(mask)
+    assert sub_iterations.shape == (np.count_nonzero(mask), 5)
+    assert np.array_equal(sub_iterations[:, 0], iterations[mask])
+    # Rohy jsou body o půl pixelu posunuté od středu, stejné jako při přímém výpočtu
+    dx = (bounds[1] - bounds[0]) / (size[0] - 1)
+    dy = (bounds[3] - bounds[2]) / (size[1] - 1)
+    rows, cols = np.nonzero(mask)
+    points = (bounds[0] + (cols - 0.5) * dx) + 1j * (bounds[2] + (rows + 0.5) * dy)
+    expected = sample_points(fractal_type, points, julia_c, 100)[0]
+    assert np.array_equal(sub_iterations[:, 3], expected)
@@ -0,0 +1,93 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+from escape_time import compute_region, RenderCancelled
+
+
+def _render_tile(shm_name, shape, dtype, z_shm_name, fractal_type, bounds, size, julia_c, max_iterations,
+                 skip_interior, y0, y1, x0, x1):
+    # Worker zapisuje výsledek přímo do sdílené paměti, nic se nevrací zpět přes pickle
+    shm = shared_memory.SharedMemory(name=shm_name)
+    z_shm = shared_memory.SharedMemory(name=z_shm_name) if z_shm_name else None
+    try:
+        out = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        result = compute_region(fractal_type, bounds, size, julia_c, max_iterations,
+                                rows=slice(y0, y1), cols=slice(x0, x1), skip_interior=skip_interior,
+                                return_z=z_shm is not None)
+        if z_shm is not None:
+            z_out = np.ndarray(shape, dtype=complex, buffer=z_shm.buf)
+            out[y0:y1, x0:x1], z_out[y0:y1, x0:x1] = result
+            del z_out
+        else:
+            out[y0:y1, x0:x1] = result
+        del out
+    finally:
+        shm.close()
+        if z_shm is not None:
+            z_shm.close()
+    return y0, x0
+
+
+class TileRenderer:
+    def __init__(self, workers=None, tile_size=128):
+        self.workers = workers or os.cpu_count() or 1
+        self.tile_size = tile_size
+        self.executor = None
+
+    def _get_executor(self):
+        if self.executor is None:
+            # spawn místo fork - rodičovský proces drží Tk, který se nesmí forkovat
+            context = multiprocessing.get_context("spawn")
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self.executor
+
+    def split_tiles(self, width, height):
+        tiles = []
+        for y0 in range(0, height, self.tile_size):
+            for x0 in range(0, width, self.tile_size):
+                tiles.append((y0, min(y0 + self.tile_size, height), x0, min(x0 + self.tile_size, width)))
+        return tiles
+
+    def render(self, fractal_type, bounds, size, julia_c, max_iterations, dtype=int, skip_interior=True,
+               return_z=False, cancel=None):
+        width, height = size
+        dtype = np.dtype(dtype)
+        shape = (height, width)
+        buffers = [shared_memory.SharedMemory(create=True, size=max(1, height * width * dtype.itemsize))]
+        if return_z:
+            buffers.append(shared_memory.SharedMemory(create=True, size=max(1, height * width * 16)))
+        try:
+            executor = self._get_executor()
+            z_name = buffers[1].name if return_z else None
+            futures = [
+                executor.submit(_render_tile, buffers[0].name, shape, dtype.str, z_name, fractal_type, bounds,
+                                size, julia_c, max_iterations, skip_interior, y0, y1, x0, x1)
+                for y0, y1, x0, x1 in self.split_tiles(width, height)
+            ]
+            for future in as_completed(futures):
+                future.result()
+                # Při zrušení se nespuštěné dlaždice zahodí, rozpracované doběhnou
+                if cancel is not None and cancel.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    for pending in futures:
+                        if not pending.cancelled():
+                            pending.exception()
+                    raise RenderCancelled()
+            iterations = np.ndarray(shape, dtype=dtype, buffer=buffers[0].buf).copy()
+            if return_z:
+                final_z = np.ndarray(shape, dtype=complex, buffer=buffers[1].buf).copy()
+        finally:
+            for shm in buffers:
+                shm.close()
+                shm.unlink()
+        if return_z:
+            return iterations, final_z
+        return iterations
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None